@@ -1,8 +1,6 @@
 import sqlite3
 import pandas as pd
 import numpy as np
-import html
-from textblob import TextBlob
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import io
@@ -17,6 +15,9 @@ from bokeh.layouts import column
 from bokeh.transform import linear_cmap
 from bokeh.palettes import Oranges256, Blues256, Purples256, Viridis256
 
+from enrichment import prepare_df
+from stack_db import init_db
+
 DB_PATH = "data/stack_questions.db"
 
 
@@ -25,57 +26,17 @@ DB_PATH = "data/stack_questions.db"
 # ============================================================
 def load_data(keyword: str) -> pd.DataFrame:
     conn = sqlite3.connect(DB_PATH)
-    query = "SELECT * FROM questions WHERE keyword = ?"
+    query = """
+        SELECT kq.keyword, kq.scraped_at, q.*
+        FROM keyword_questions kq
+        JOIN questions q ON q.question_id = kq.question_id
+        WHERE kq.keyword = ?
+    """
     df = pd.read_sql_query(query, conn, params=[keyword])
     conn.close()
     return df
 
 
-# ============================================================
-# PREPARE DATAFRAME
-# ============================================================
-def prepare_df(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    df["Title"] = df["title"].apply(html.unescape)
-    df["Author"] = df["author"]
-    df["Score"] = df["score"]
-    df["URL"] = df["url"]
-
-    df["Title Length"] = df["Title"].apply(len)
-
-    df["Short Title"] = df["Title"].apply(
-        lambda x: x if len(x) <= 80 else x[:77] + "..."
-    )
-
-    # ✅ FIX: Bokeh-safe alias (NO spaces)
-    df["ShortTitle"] = df["Short Title"]
-
-    df["Sentiment"] = df["Title"].apply(lambda x: TextBlob(x).sentiment.polarity)
-
-    if "creation_date" in df.columns:
-        df["Creation Date"] = pd.to_datetime(df["creation_date"], errors="coerce")
-        df["Creation Day"] = df["Creation Date"].dt.date
-
-    # ⭐ HOTNESS METRIC
-    df["Hotness"] = (
-        df["Score"] * 1
-        + df["answer_count"] * 2
-        + df["view_count"] / 100
-    )
-
-    df = df.dropna(subset=["Title", "Author", "URL"])
-    df = df[df["URL"] != ""]
-    df = df.drop_duplicates(subset=["Title"], keep="first")
-
-    # needed for Bokeh y-axis stability
-    df["ShortShort"] = df["Short Title"].apply(
-        lambda s: s[:50] + "..." if len(s) > 50 else s
-    )
-
-    return df
-
-
 # ============================================================
 # WORD CLOUD → image → HTML
 # ============================================================
@@ -378,12 +339,14 @@ def main():
         print("No keyword entered.")
         return
 
+    # creates the sentiment cache table on older databases
+    init_db(DB_PATH)
     df = load_data(keyword)
     if df.empty:
         print(f"No data found for '{keyword}'. Run scraper first.")
         return
 
-    df = prepare_df(df)
+    df = prepare_df(df, DB_PATH)
     df_hot = df.sort_values("Hotness", ascending=False)
 
     print("Generating report...")
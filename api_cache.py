@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from stack_db import DB_PATH
+
+# stored next to data/stack_questions.db
+CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), "api_cache.db")
+
+# how long a cached API response counts as fresh
+CACHE_TTL_SECONDS = 15 * 60
+
+# total size of stored (compressed) bodies before LRU eviction kicks in
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def normalize_key(url: str, params: dict = None) -> str:
+    """
+    Canonical cache key for a GET: lower-cased scheme/host, query params
+    merged with `params` and sorted, fragment dropped.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in params.items() if v is not None]
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path,
+        urlencode(sorted(query)),
+        "",
+    ))
+
+
+# ============================================================
+# RESPONSE CACHE
+# ============================================================
+class ResponseCache:
+    """
+    On-disk cache of StackExchange JSON responses in a small SQLite file.
+    Entries older than `ttl` are misses; once the stored bodies exceed
+    `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = None, ttl: float = CACHE_TTL_SECONDS,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path or CACHE_PATH
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    body BLOB,
+                    size INTEGER,
+                    fetched_at REAL,
+                    last_access REAL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+                "ON responses(last_access)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, url: str, params: dict = None):
+        """Return the cached JSON body if present and fresh, else None."""
+        key = normalize_key(url, params)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT body, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+
+            conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (now, key),
+            )
+            conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, url: str, params: dict, data: dict):
+        """Store a response body, then evict LRU entries over the size cap."""
+        key = normalize_key(url, params)
+        body = zlib.compress(json.dumps(data).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, body, size, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, body, len(body), now, now),
+            )
+            self.stores += 1
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+            }
@@ -0,0 +1,139 @@
+import random
+import re
+import threading
+import time
+
+# StackExchange bans IPs that exceed ~30 requests/sec; stay well below it
+DEFAULT_RATE = 10.0   # tokens (requests) added per second
+DEFAULT_BURST = 10    # bucket capacity
+
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 1.0    # seconds, doubled per attempt (plus jitter)
+RETRY_MAX_DELAY = 60.0    # longer waits raise instead of blocking a worker
+
+# API error ids worth retrying: internal_error, throttle_violation,
+# temporarily_unavailable
+RETRYABLE_ERROR_IDS = {500, 502, 503}
+
+# requests kept back from the daily quota for interactive dashboard use
+QUOTA_RESERVE = 10
+
+
+# ============================================================
+# TOKEN BUCKET
+# ============================================================
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/second, at most `capacity` banked."""
+
+    def __init__(self, rate: float = DEFAULT_RATE,
+                 capacity: int = DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until one token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# ============================================================
+# REQUEST SCHEDULER
+# ============================================================
+class RequestScheduler:
+    """
+    Central gate for every outbound StackExchange call.
+
+    - a token bucket caps the request rate across all threads
+    - a `backoff` returned by the API blocks further calls to that method
+      until it has elapsed
+    - `quota_remaining` is tracked so batch jobs can spread what is left
+      of the daily quota across the keywords still queued
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 max_retries: int = MAX_RETRIES):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self.backoff_until = {}     # method path -> monotonic deadline
+        self.quota_remaining = None
+        self.quota_max = None
+        self.backoffs = 0
+        self.retries = 0
+
+    def wait_turn(self, method: str):
+        """Block until `method` is out of backoff and a token is free."""
+        with self._lock:
+            deadline = self.backoff_until.get(method, 0)
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.bucket.acquire()
+
+    def record(self, method: str, data: dict):
+        """Pick up `backoff` and quota fields from an API response."""
+        with self._lock:
+            if data.get("quota_remaining") is not None:
+                self.quota_remaining = data["quota_remaining"]
+            if data.get("quota_max") is not None:
+                self.quota_max = data["quota_max"]
+
+            backoff = data.get("backoff")
+            if backoff:
+                self.backoffs += 1
+                self.backoff_until[method] = max(
+                    self.backoff_until.get(method, 0),
+                    time.monotonic() + backoff,
+                )
+
+    def retry_delay(self, attempt: int, data: dict = None) -> float:
+        """
+        Exponential backoff with jitter for retry number `attempt` (0-based).
+        A throttle_violation message ("... available in N seconds") sets the
+        floor of the delay.
+        """
+        delay = RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+        if data:
+            match = re.search(r"(\d+) seconds", data.get("error_message", ""))
+            if match:
+                delay = max(delay, float(match.group(1)))
+        with self._lock:
+            self.retries += 1
+        return delay
+
+    def page_budget(self, max_pages: int, queued_keywords: int = 1) -> int:
+        """
+        Pages one keyword may still fetch so the remaining daily quota is
+        shared fairly between `queued_keywords`. Unknown quota → max_pages.
+        """
+        with self._lock:
+            remaining = self.quota_remaining
+        if remaining is None:
+            return max_pages
+        usable = max(0, remaining - QUOTA_RESERVE)
+        if usable == 0:
+            return 0
+        return min(max_pages, max(1, usable // max(1, queued_keywords)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "quota_remaining": self.quota_remaining,
+                "quota_max": self.quota_max,
+                "backoffs": self.backoffs,
+                "retries": self.retries,
+            }
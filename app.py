@@ -1,209 +1,57 @@
-from flask import Flask, render_template, request
-import sqlite3
+from flask import Flask, jsonify, render_template, request
 import pandas as pd
-import html
-from textblob import TextBlob
+import time
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import io
 import base64
-import requests                     
-from datetime import datetime   
 from bokeh.embed import components
 from bokeh.plotting import figure
 from bokeh.models import ColumnDataSource, HoverTool, TapTool, OpenURL
 from bokeh.transform import linear_cmap
 from bokeh.palettes import Oranges256, Blues256, Purples256, Viridis256
 from bokeh.resources import CDN
-import os 
-DB_PATH = "data/stack_questions.db"
+from stack_db import (DB_PATH, SEARCH_LIMIT, get_author_counts,
+                      get_keyword_history, get_keyword_overlap,
+                      get_search_tag_counts, get_shared_questions,
+                      get_tag_counts, get_top_questions, init_db, load_data,
+                      record_view, release_conns, reset_db,
+                      search_questions)
+from batch_scraper import stale_keywords
+from jobs import get_job, submit_scrape
+from api_cache import CACHE_TTL_SECONDS
+from stack_client import get_client
+from enrichment import prepare_df
 
 app = Flask(__name__)
 
-# ============================================================
-# SCRAPER HELPERS (called from web app)
-# ============================================================
-def init_db():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            keyword TEXT,
-            scraped_at TEXT,
-            title TEXT,
-            author TEXT,
-            score INTEGER,
-            url TEXT,
-            answer_count INTEGER,
-            is_answered INTEGER,
-            view_count INTEGER,
-            creation_date TEXT,
-            tags TEXT
-        )
-        """
-    )
-    conn.commit()
-    conn.close()
 
+@app.teardown_request
+def _release_db(exc):
+    # the threaded server runs each request on a new thread: hand its
+    # SQLite connection to the pool instead of leaving it to the GC
+    release_conns()
 
-def reset_db():
-    """Delete the SQLite DB file (full reset)."""
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
-        print("Database file removed.")
 
+# the stored columns prepare_df reads (load_data projects to these): the
+# title already unescaped at ingest and SQLite's hotness. The short labels
+# are cheaper to cut in pandas than to load as extra text columns.
+LOAD_COLUMNS = ["display_title", "author", "score", "url", "answer_count",
+                "view_count", "creation_date", "hotness"]
 
-def scrape_keyword(keyword: str):
-    """
-    Scrape StackOverflow via StackExchange API for a keyword
-    and append rows into the SQLite DB.
-    """
-    if not keyword:
-        return
-
-    # build API url
-    url = (
-        "https://api.stackexchange.com/2.3/search?"
-        f"order=desc&sort=votes&intitle={keyword}"
-        "&site=stackoverflow&pagesize=100"
-    )
-
-    response = requests.get(url)
-    data = response.json()
-
-    posts = []
-    scraped_at = datetime.utcnow().isoformat()
-
-    for item in data.get("items", []):
-        title = item.get("title", "No title")
-        author = item.get("owner", {}).get("display_name", "Anonymous")
-        score = item.get("score", 0)
-        link = item.get("link", "")
-        answer_count = item.get("answer_count", 0)
-        is_answered = 1 if item.get("is_answered", False) else 0
-        view_count = item.get("view_count", 0)
-        creation_ts = item.get("creation_date")  # unix timestamp
-        creation_date = (
-            datetime.utcfromtimestamp(creation_ts).isoformat()
-            if creation_ts is not None else None
-        )
-        tags = ",".join(item.get("tags", []))
-
-        posts.append([
-            keyword, scraped_at, title, author, score, link,
-            answer_count, is_answered, view_count, creation_date, tags
-        ])
-
-    if not posts:
-        return
-
-    cols = [
-        "keyword",
-        "scraped_at",
-        "title",
-        "author",
-        "score",
-        "url",
-        "answer_count",
-        "is_answered",
-        "view_count",
-        "creation_date",
-        "tags",
-    ]
-    df = pd.DataFrame(posts, columns=cols)
-
-    conn = sqlite3.connect(DB_PATH)
-    df.to_sql("questions", conn, if_exists="append", index=False)
-    conn.close()
-    print(f"Scraped {len(df)} questions for '{keyword}'")
-
-
-
-# ============================================================
-# DB HELPERS
-# ============================================================
-def load_data(keyword: str) -> pd.DataFrame:
-    conn = sqlite3.connect(DB_PATH)
-    query = "SELECT * FROM questions WHERE keyword = ?"
-    df = pd.read_sql_query(query, conn, params=[keyword])
-    conn.close()
-    df = df.drop_duplicates(subset=['url'])
-    return df
-
-
-def get_keyword_history(limit: int = 30):
-    if not os.path.exists(DB_PATH):
-        return []
-
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        query = """
-            SELECT keyword, MAX(scraped_at) AS last_seen
-            FROM questions
-            GROUP BY keyword
-            ORDER BY datetime(last_seen) DESC
-            LIMIT ?
-        """
-        df = pd.read_sql_query(query, conn, params=[limit])
-        conn.close()
-        return df["keyword"].tolist()
-    except Exception as e:
-        print(f"History error: {e}")
-        return []
-
-
-
-# ============================================================
-# DATA PREP
-# ============================================================
-def prepare_df(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    df["Title"] = df["title"].apply(html.unescape)
-    df["Author"] = df["author"]
-    df["Score"] = df["score"]
-    df["URL"] = df["url"]
-
-    df["Title Length"] = df["Title"].apply(len)
-
-    df["Short Title"] = df["Title"].apply(
-        lambda x: x if len(x) <= 80 else x[:77] + "..."
-    )
-
-    # ✅ FIX: Bokeh-safe alias (NO spaces)
-    df["ShortTitle"] = df["Short Title"]
-
-    df["Sentiment"] = df["Title"].apply(
-        lambda x: TextBlob(x).sentiment.polarity
-    )
-
-    if "creation_date" in df.columns:
-        df["Creation Date"] = pd.to_datetime(
-            df["creation_date"], errors="coerce"
-        )
-        df["Creation Day"] = df["Creation Date"].dt.date
-
-    # ⭐ HOTNESS METRIC
-    df["Hotness"] = (
-        df["Score"] * 1
-        + df["answer_count"] * 2
-        + df["view_count"] / 100
-    )
-
-    df = df.dropna(subset=["Title", "Author", "URL"])
-    df = df[df["URL"] != ""]
-    df = df.drop_duplicates(subset=["Title"], keep="first")
-
-    # short label for axes
-    df["ShortShort"] = df["Short Title"].apply(
-        lambda s: s[:50] + "..." if len(s) > 50 else s
-    )
-
-    return df
+# stack_db.get_top_questions columns → the prepare_df names the charts use
+TOP_CHART_COLUMNS = {
+    "display_title": "Title",
+    "short_title": "ShortTitle",
+    "axis_label": "ShortShort",
+    "url": "URL",
+    "hotness": "Hotness",
+    "title_length": "Title Length",
+}
 
+# what /search returns per question
+SEARCH_COLUMNS = ["display_title", "url", "score", "answer_count",
+                  "view_count", "creation_date", "tags", "question_id"]
 
 # ============================================================
 # WORD CLOUD
@@ -406,12 +254,18 @@ def bokeh_hotness_ranking(df_hot, label):
     return style_figure(p)
 
 
-def bokeh_authors(df_hot, label):
-    df = df_hot["Author"].value_counts().head(5).reset_index()
-    if df.empty:
+def author_counts(df_hot) -> pd.DataFrame:
+    """[Author, Count] for the five most frequent authors of a prepared frame."""
+    counts = df_hot["Author"].value_counts().head(5).reset_index()
+    counts.columns = ["Author", "Count"]
+    return counts
+
+
+def bokeh_authors(counts, label):
+    """Top-author bars from an [Author, Count] frame (stack_db.get_author_counts)."""
+    if counts.empty:
         return None
-    df.columns = ["Author", "Count"]
-    df = df.iloc[::-1]
+    df = counts.iloc[::-1]
 
     source = ColumnDataSource(df)
 
@@ -585,14 +439,11 @@ def bokeh_time_series(df_hot, label):
     return style_figure(p)
 
 
-def bokeh_tags(df_hot, label):
-    tags = df_hot["tags"].dropna().str.split(",").explode()
-    if tags.empty:
+def bokeh_tags(counts, label):
+    """Top-tag bars from a [Tag, Count] frame (stack_db.get_tag_counts)."""
+    if counts.empty:
         return None
 
-    counts = tags.value_counts().head(10).reset_index()
-    counts.columns = ["Tag", "Count"]
-
     source = ColumnDataSource(counts)
 
     p = figure(
@@ -640,25 +491,93 @@ def wrap_plot(fig):
 # ============================================================
 # COMBINE ALL PLOTS FOR ONE KEYWORD
 # ============================================================
-def build_keyword_plots(df: pd.DataFrame, label: str):
-    df_hot = df.sort_values("Hotness", ascending=False)
+def top_questions(keyword: str, by: str, limit: int, tag: str = ""):
+    """get_top_questions with the chart column names."""
+    return get_top_questions(keyword, by, limit, tag=tag or None).rename(
+        columns=TOP_CHART_COLUMNS)
+
+
+def build_keyword_plots(df: pd.DataFrame, label: str, tag: str = "",
+                        tag_counts: pd.DataFrame = None, keyword: str = None):
+    """
+    All charts for one prepared frame. With a stored `keyword`, the top-N
+    bars and author counts are answered by SQL (indexed ORDER BY ... LIMIT
+    and GROUP BY) instead of sorting and counting the whole frame.
+    """
+    if tag_counts is None:
+        tag_counts = get_tag_counts(label, tag=tag)
+    if keyword:
+        hot = top_questions(keyword, "hotness", 15, tag)
+        longest = top_questions(keyword, "title_length", 5, tag)
+        authors = get_author_counts(keyword, 5, tag=tag or None)
+    else:
+        hot = longest = df
+        authors = author_counts(df)
 
     return {
-        "top_hot": wrap_plot(bokeh_top_hot(df_hot, label)),
-        "longest": wrap_plot(bokeh_longest_titles(df_hot, label)),
-        "authors": wrap_plot(bokeh_authors(df_hot, label)),
-        "hot_rank": wrap_plot(bokeh_hotness_ranking(df_hot, label)),
-        "sentiment": wrap_plot(bokeh_sentiment_vs_hotness(df_hot, label)),
-        "titlelen": wrap_plot(bokeh_titlelen_vs_hotness(df_hot, label)),
-        "time_series": wrap_plot(bokeh_time_series(df_hot, label)),
-        "tags": wrap_plot(bokeh_tags(df_hot, label)),
-        "wordcloud": generate_wordcloud(df_hot),
+        "top_hot": wrap_plot(bokeh_top_hot(hot, label)),
+        "longest": wrap_plot(bokeh_longest_titles(longest, label)),
+        "authors": wrap_plot(bokeh_authors(authors, label)),
+        "hot_rank": wrap_plot(bokeh_hotness_ranking(hot, label)),
+        "sentiment": wrap_plot(bokeh_sentiment_vs_hotness(df, label)),
+        "titlelen": wrap_plot(bokeh_titlelen_vs_hotness(df, label)),
+        "time_series": wrap_plot(bokeh_time_series(df, label)),
+        "tags": wrap_plot(bokeh_tags(tag_counts, label)),
+        "wordcloud": generate_wordcloud(df),
     }
 
 
 # ============================================================
-# ROUTE
+# BACKGROUND SCRAPES
 # ============================================================
+def submit_load_job(keyword: str, compare: str = ""):
+    """
+    Queue a background scrape for the keywords that need one and return
+    the job id, or None when everything was fetched within the cache window.
+    """
+    keywords = [k for k in (keyword, compare) if k]
+    full = request.form.get("full_refresh") == "1"
+    if not full:
+        keywords = stale_keywords(DB_PATH, keywords, CACHE_TTL_SECONDS)
+    if not keywords:
+        return None
+    return submit_scrape(keywords, full=full)
+
+
+# ============================================================
+# ROUTES
+# ============================================================
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job)
+
+
+@app.route("/search")
+def search():
+    """Full-text search over stored titles/tags: ?q=...&keyword=&limit="""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "missing q"}), 400
+    keyword = request.args.get("keyword", "").strip() or None
+    # LIMIT -1 would mean "no limit" to SQLite
+    limit = max(1, min(request.args.get("limit", 50, type=int),
+                       SEARCH_LIMIT))
+
+    start = time.perf_counter()
+    df = search_questions(query, keyword=keyword, limit=limit,
+                          columns=SEARCH_COLUMNS)
+    return jsonify({
+        "query": query,
+        "keyword": keyword,
+        "count": len(df),
+        "ms": round((time.perf_counter() - start) * 1000, 1),
+        "results": df.to_dict(orient="records"),
+    })
+
+
 @app.route("/", methods=["GET", "POST"])
 def dashboard():
     history = get_keyword_history()
@@ -666,7 +585,12 @@ def dashboard():
     cmp = None
     keyword = ""
     compare = ""
+    tag = ""
+    search_text = ""
+    overlap = None
+    shared = []
     msg = None
+    job_id = None
 
     if request.method == "POST":
         action = request.form.get("action", "load")
@@ -674,6 +598,7 @@ def dashboard():
         # --- RESET BUTTON PRESSED ---
         if action == "reset":
             reset_db()
+            get_client().cache.clear()
             keyword = ""
             compare = ""
             msg = "All data has been reset."
@@ -681,6 +606,21 @@ def dashboard():
             main = None
             cmp = None
             # fall through to render_template at the bottom
+        elif action == "search":
+            # --- SEARCH STORED PRESSED: charts from a local full-text query ---
+            search_text = request.form.get("search", "").strip()
+            if not search_text:
+                msg = "Please enter words to search for."
+            else:
+                init_db()
+                df = search_questions(search_text, columns=LOAD_COLUMNS)
+                if df.empty:
+                    msg = f"No stored question titles match '{search_text}'."
+                else:
+                    main = build_keyword_plots(
+                        prepare_df(df), f"“{search_text}”",
+                        tag_counts=get_search_tag_counts(search_text),
+                    )
         else:
             # --- LOAD DATA PRESSED ---
             kw_input = request.form.get("keyword", "").strip()
@@ -688,6 +628,7 @@ def dashboard():
 
             keyword = kw_input or kw_hist
             compare = request.form.get("compare_keyword", "").strip()
+            tag = request.form.get("tag", "").strip().lower()
 
             if compare and compare == keyword:
                 msg = "Compare keyword cannot be the same as main keyword."
@@ -697,36 +638,67 @@ def dashboard():
                 msg = "Please enter or select a keyword."
             else:
                 init_db()
-                # scrape main keyword
-                scrape_keyword(keyword)
-                df = load_data(keyword)
+                # scraping runs on a background worker; the page renders
+                # from stored data right away and reloads when the job is done
+                if action == "load":
+                    for kw in (keyword, compare):
+                        if kw:
+                            record_view(kw)
+                    job_id = submit_load_job(keyword, compare)
+                elif action == "view" and request.form.get("job_id"):
+                    job = get_job(request.form["job_id"])
+                    if job and job["error"]:
+                        msg = f"Scrape problem: {job['error']}"
+
+                df = load_data(keyword, tag=tag, columns=LOAD_COLUMNS)
                 if df.empty:
-                    msg = f"No data could be loaded for '{keyword}'."
+                    if tag and not job_id:
+                        msg = msg or (f"No stored '{keyword}' questions "
+                                      f"are tagged '{tag}'.")
+                    elif job_id:
+                        msg = (f"Scraping '{keyword}' in the background — "
+                               "charts will appear when it finishes.")
+                    else:
+                        msg = msg or f"No data could be loaded for '{keyword}'."
                 else:
                     df = prepare_df(df)
-                    main = build_keyword_plots(df, keyword)
+                    main = build_keyword_plots(df, keyword, tag, keyword=keyword)
 
-                    # scrape compare keyword if provided
+                    # compare keyword if provided
                     if compare:
-                        scrape_keyword(compare)
-                        dfc = load_data(compare)
-                        if dfc.empty:
+                        dfc = load_data(compare, tag=tag, columns=LOAD_COLUMNS)
+                        if dfc.empty and job_id:
+                            msg = (f"Scraping '{compare}' in the background — "
+                                   "its charts will appear when it finishes.")
+                        elif dfc.empty:
                             msg = f"No data for compare keyword '{compare}'."
                             compare = ""
                         else:
                             dfc = prepare_df(dfc)
-                            cmp = build_keyword_plots(dfc, compare)
-
+                            cmp = build_keyword_plots(dfc, compare, tag,
+                                                      keyword=compare)
 
+                        # questions both keywords found (keyword_questions join)
+                        if compare:
+                            overlap = get_keyword_overlap(keyword, compare)
+                            shared = get_shared_questions(
+                                keyword, compare, limit=5
+                            )
+                            shared = shared.to_dict(orient="records")
 
     return render_template(
         "dashboard.html",
         keyword=keyword,
         compare_keyword=compare,
+        tag=tag,
+        search=search_text,
+        overlap=overlap,
+        shared=shared,
         msg=msg,
         history=history,
         main=main,
         compare=cmp,
+        job_id=job_id,
         cdn_css=CDN.css_files,
         cdn_js=CDN.js_files,
     )
@@ -0,0 +1,263 @@
+"""
+Batch scraper: fetch many keywords concurrently over asyncio.
+
+    python batch_scraper.py python pandas docker
+    python batch_scraper.py --file keywords.txt --concurrency 8 --max-pages 3
+
+API requests run concurrently (bounded by --concurrency), while every
+insert goes through the process-wide database writer (stack_db.get_writer),
+so parallel fetches never fight over the database lock.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stack_client import get_client
+from stack_db import (DB_PATH, get_conn, get_high_water_mark,
+                      get_last_fetched, get_writer, init_db, mark_fetched,
+                      refresh_mirror)
+from stack_scraper import DEFAULT_MAX_PAGES, fetch_page, store_items
+
+DEFAULT_CONCURRENCY = 8
+
+
+# ============================================================
+# FETCHERS
+# ============================================================
+async def fetch_keyword(keyword: str, max_pages: int, fromdate,
+                        sem: asyncio.Semaphore, queue: asyncio.Queue,
+                        pending: dict, executor: ThreadPoolExecutor,
+                        use_cache: bool = True):
+    """
+    Walk the result pages for one keyword and queue each page for writing.
+    Requests run on `executor`; `use_cache=False` skips the response cache. `pending["keywords"]` counts keywords not
+    finished yet, so the remaining API quota is shared between them.
+    """
+    loop = asyncio.get_running_loop()
+    scheduler = get_client().scheduler
+    scraped_at = int(time.time())
+    page = 1
+    complete = True
+    try:
+        while page <= max_pages:
+            if page > scheduler.page_budget(max_pages, pending["keywords"]):
+                print(f"Quota budget reached for '{keyword}' at page {page}")
+                complete = False
+                break
+
+            async with sem:
+                data = await loop.run_in_executor(
+                    executor, fetch_page, keyword, page, fromdate, use_cache
+                )
+
+            items = data.get("items", [])
+            if not items:
+                break
+            # cached pages were already stored when they were first fetched;
+            # parsing happens in the writer thread, off the event loop
+            if not data.get("_from_cache"):
+                await queue.put((keyword, page, items, scraped_at))
+
+            if not data.get("has_more"):
+                break
+            page += 1
+    finally:
+        pending["keywords"] -= 1
+
+    # page=None tells the writer the walk finished, with whether it
+    # completed in place of the items
+    await queue.put((keyword, None, complete, scraped_at))
+
+
+def load_fromdates(db_path: str, keywords: list, full: bool) -> dict:
+    """{keyword: fromdate or None} from the stored high-water marks."""
+    if full:
+        return {k: None for k in keywords}
+    conn = get_conn(db_path)
+    hwms = {k: get_high_water_mark(conn, k) for k in keywords}
+    return {k: (hwm + 1 if hwm else None) for k, hwm in hwms.items()}
+
+
+def stale_keywords(db_path: str, keywords: list, max_age: float) -> list:
+    """Keywords not fetched within the last `max_age` seconds."""
+    now = time.time()
+    conn = get_conn(db_path)
+    stale = []
+    for k in keywords:
+        last = get_last_fetched(conn, k)
+        if last is None or now - last > max_age:
+            stale.append(k)
+    return stale
+
+
+# ============================================================
+# SINGLE WRITER
+# ============================================================
+async def writer(queue: asyncio.Queue, db_path: str, stats: dict):
+    """Drain the queue into SQLite through the shared database writer."""
+    db_writer = get_writer(db_path)
+    while True:
+        entry = await queue.get()
+        if entry is None:
+            queue.task_done()
+            break
+
+        keyword, page, items, scraped_at = entry
+        kw_stats = stats.setdefault(
+            keyword, {"pages": 0, "rows": 0, "insert_seconds": []}
+        )
+        # any failure is reported per page: if this task died, fetchers
+        # would block on the full queue and the whole scrape would hang
+        try:
+            if page is None:
+                complete = items
+                # a walk the quota cut short stays due for the next scrape
+                if complete:
+                    await asyncio.wrap_future(
+                        db_writer.submit(mark_fetched, keyword, scraped_at)
+                    )
+                if kw_stats["pages"]:
+                    await asyncio.to_thread(refresh_mirror, keyword, db_path)
+                continue
+
+            n_rows, elapsed = await asyncio.wrap_future(
+                db_writer.submit(store_items, items, keyword, scraped_at)
+            )
+            kw_stats["pages"] += 1
+            kw_stats["rows"] += n_rows
+            kw_stats["insert_seconds"].append(elapsed)
+            print(
+                f"  {keyword} page {page}: stored {n_rows} rows "
+                f"in {elapsed * 1000:.1f} ms"
+            )
+        except Exception as e:
+            step = f"page {page}: insert" if page else "finishing"
+            print(f"  {keyword} {step} failed: {e}")
+        finally:
+            queue.task_done()
+
+
+# ============================================================
+# ENTRY POINTS
+# ============================================================
+async def scrape_many_async(keywords, concurrency: int = DEFAULT_CONCURRENCY,
+                            max_pages: int = DEFAULT_MAX_PAGES,
+                            db_path: str = None, full: bool = False,
+                            max_age: float = None) -> dict:
+    """
+    Scrape all keywords with at most `concurrency` API requests in flight.
+    Keywords seen before are scraped incrementally unless `full` is set;
+    with `max_age`, keywords fetched less than that many seconds ago are
+    skipped entirely and served from what is already stored.
+    Returns {keyword: {"pages", "rows", "insert_seconds"}}.
+    A keyword whose fetch fails is reported and skipped; the rest continue.
+    """
+    keywords = list(dict.fromkeys(k for k in keywords if k))
+    stats = {}
+    db_path = db_path or DB_PATH
+    if keywords and max_age is not None and not full:
+        keywords = await asyncio.to_thread(
+            stale_keywords, db_path, keywords, max_age
+        )
+    if not keywords:
+        return stats
+
+    fromdates = await asyncio.to_thread(load_fromdates, db_path, keywords, full)
+
+    concurrency = max(1, concurrency)
+    sem = asyncio.Semaphore(concurrency)
+    # bounded so fast fetchers cannot pile up unwritten pages in memory
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    writer_task = asyncio.create_task(writer(queue, db_path, stats))
+    pending = {"keywords": len(keywords)}
+
+    # a thread per request in flight: asyncio's default executor would
+    # cap them at min(32, cpus + 4), and so would a smaller HTTP pool
+    get_client().ensure_pool_size(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency,
+                                  thread_name_prefix="fetch")
+    try:
+        results = await asyncio.gather(
+            # a full rescrape must reach the API, not replay cached pages
+            *(fetch_keyword(k, max_pages, fromdates[k], sem, queue, pending,
+                            executor, use_cache=not full)
+              for k in keywords),
+            return_exceptions=True,
+        )
+    finally:
+        executor.shutdown(wait=False)
+    for keyword, result in zip(keywords, results):
+        if isinstance(result, Exception):
+            print(f"Scrape failed for '{keyword}': {result}")
+
+    await queue.put(None)
+    await writer_task
+    return stats
+
+
+def scrape_many(keywords, concurrency: int = DEFAULT_CONCURRENCY,
+                max_pages: int = DEFAULT_MAX_PAGES, db_path: str = None,
+                full: bool = False, max_age: float = None) -> dict:
+    """Synchronous wrapper around scrape_many_async (for Flask / scripts)."""
+    return asyncio.run(
+        scrape_many_async(keywords, concurrency, max_pages, db_path, full,
+                          max_age)
+    )
+
+
+def read_keywords(path: str) -> list:
+    """One keyword per line; blank lines and '#' comments are ignored."""
+    with open(path, encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scrape many StackOverflow keywords concurrently."
+    )
+    parser.add_argument("keywords", nargs="*", help="keywords to scrape")
+    parser.add_argument("--file", "-f", help="file with one keyword per line")
+    parser.add_argument("--concurrency", "-c", type=int,
+                        default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--max-pages", "-p", type=int,
+                        default=DEFAULT_MAX_PAGES)
+    parser.add_argument("--full", action="store_true",
+                        help="ignore high-water marks and rescrape top-voted")
+    args = parser.parse_args()
+
+    keywords = list(args.keywords)
+    if args.file:
+        keywords += read_keywords(args.file)
+    if not keywords:
+        parser.error("no keywords given (pass them as arguments or --file)")
+
+    init_db()
+    start = time.perf_counter()
+    stats = scrape_many(keywords, args.concurrency, args.max_pages,
+                        full=args.full)
+    elapsed = time.perf_counter() - start
+
+    total_rows = sum(s["rows"] for s in stats.values())
+    print(
+        f"Scraped {total_rows} questions for {len(stats)}/{len(keywords)} "
+        f"keywords in {elapsed:.1f}s"
+    )
+    http = get_client().stats()
+    print(
+        f"HTTP: {http['requests']} requests ({http['errors']} errors), "
+        f"{http['bytes_received'] / 1024:.0f} KiB received, "
+        f"{http['bytes_decoded'] / 1024:.0f} KiB decoded"
+    )
+    sched = http["scheduler"]
+    print(f"Scheduler: {sched['retries']} retries, {sched['backoffs']} "
+          f"backoffs, quota remaining {sched['quota_remaining']}")
+    cache = http.get("cache")
+    if cache:
+        print(f"Cache: {cache['hits']} hits, {cache['misses']} misses, "
+              f"{cache['evictions']} evictions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Concurrent readers + writers against one SQLite file.
+
+    python benchmarks/bench_concurrency.py
+    python benchmarks/bench_concurrency.py --readers 8 --writers 4 --seconds 10
+
+Two modes, each on a fresh database seeded with the same data:
+
+  legacy   every call opens its own sqlite3.connect (rollback journal),
+           writers write directly and compete for the lock
+  managed  per-thread reused connections in WAL mode (stack_db.get_conn),
+           all writes through the single stack_db.get_writer thread
+
+Readers loop over load_data / get_keyword_history / get_tag_counts while
+writers upsert 100-row pages; reports ops/sec, p50/p95 latency and
+"database is locked" errors.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+import stack_db  # noqa: E402
+from bench_scrape import percentile  # noqa: E402
+from mock_api import make_question  # noqa: E402
+from stack_scraper import store_items  # noqa: E402
+
+SCRAPED_AT = 1_704_067_200     # 2024-01-01 UTC
+PAGE_SIZE = 100
+
+
+def page_items(keyword: str, page: int) -> list:
+    return [make_question(keyword, page * PAGE_SIZE + i)
+            for i in range(PAGE_SIZE)]
+
+
+# ============================================================
+# OPERATIONS (legacy: one connection per call)
+# ============================================================
+def legacy_read(db_path, keyword):
+    conn = sqlite3.connect(db_path)
+    try:
+        pd.read_sql_query("SELECT kq.keyword, kq.scraped_at, q.* "
+                          "FROM keyword_questions kq JOIN questions q "
+                          "ON q.question_id = kq.question_id "
+                          "WHERE kq.keyword = ?", conn, params=[keyword])
+        conn.execute("SELECT keyword FROM keywords "
+                     "ORDER BY last_seen DESC LIMIT 30").fetchall()
+        conn.execute("SELECT t.tag, COUNT(*) FROM keyword_questions kq "
+                     "JOIN question_tags t ON t.question_id = kq.question_id "
+                     "WHERE kq.keyword = ? GROUP BY t.tag",
+                     (keyword,)).fetchall()
+    finally:
+        conn.close()
+
+
+def legacy_write(db_path, keyword, items):
+    conn = sqlite3.connect(db_path)
+    try:
+        store_items(conn, items, keyword, SCRAPED_AT)
+    finally:
+        conn.close()
+
+
+# ============================================================
+# OPERATIONS (managed: get_conn + single writer)
+# ============================================================
+def managed_read(db_path, keyword):
+    stack_db.load_data(keyword, db_path)
+    stack_db.get_keyword_history(30, db_path)
+    stack_db.get_tag_counts(keyword, db_path=db_path)
+
+
+def managed_write(db_path, keyword, items):
+    stack_db.get_writer(db_path).run(store_items, items, keyword, SCRAPED_AT)
+
+
+MODES = {
+    "legacy": (legacy_read, legacy_write),
+    "managed": (managed_read, managed_write),
+}
+
+
+# ============================================================
+# RUNNER
+# ============================================================
+def make_db(mode: str, keywords: list, seed_pages: int) -> str:
+    db_path = os.path.join(tempfile.mkdtemp(prefix="stack_conc_"), "bench.db")
+    if mode == "managed":
+        stack_db.init_db(db_path)
+        conn = stack_db.get_conn(db_path)
+    else:
+        conn = sqlite3.connect(db_path)
+        stack_db._create_schema(conn)
+    for kw in keywords:
+        for page in range(seed_pages):
+            store_items(conn, page_items(kw, page), kw, SCRAPED_AT)
+    if mode == "legacy":
+        conn.close()
+    return db_path
+
+
+def worker(op, db_path, keywords, deadline, result, make_args):
+    rng = random.Random(threading.get_ident())
+    counter = 0
+    while time.perf_counter() < deadline:
+        keyword = rng.choice(keywords)
+        counter += 1
+        op_args = make_args(keyword, counter)
+        t0 = time.perf_counter()
+        try:
+            op(db_path, *op_args)
+        except sqlite3.OperationalError as e:
+            result["errors"] += 1
+            if "locked" not in str(e):
+                raise
+            continue
+        result["latencies"].append(time.perf_counter() - t0)
+
+
+def run_mode(mode, keywords, args):
+    read, write = MODES[mode]
+    db_path = make_db(mode, keywords, args.seed_pages)
+    reads = {"latencies": [], "errors": 0}
+    writes = {"latencies": [], "errors": 0}
+    deadline = time.perf_counter() + args.seconds
+
+    threads = [
+        threading.Thread(target=worker, args=(
+            read, db_path, keywords, deadline, reads,
+            lambda kw, n: (kw,),
+        ))
+        for _ in range(args.readers)
+    ]
+    for w in range(args.writers):
+        # pages are built up front so writers measure SQLite, not item
+        # generation; each writer gets its own question ids
+        pages = {kw: [page_items(kw, args.seed_pages + w * 1_000 + p)
+                      for p in range(args.write_pages)]
+                 for kw in keywords}
+        threads.append(threading.Thread(target=worker, args=(
+            write, db_path, keywords, deadline, writes,
+            lambda kw, n, pages=pages: (kw, pages[kw][n % len(pages[kw])]),
+        )))
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for name, r in (("reads", reads), ("writes", writes)):
+        lat = r["latencies"]
+        rows.append({
+            "mode": mode,
+            "op": name,
+            "ops": len(lat),
+            "ops_per_sec": len(lat) / elapsed,
+            "p50_ms": percentile(lat, 50) * 1000,
+            "p95_ms": percentile(lat, 95) * 1000,
+            "errors": r["errors"],
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--keywords", type=int, default=10)
+    parser.add_argument("--seed-pages", type=int, default=5,
+                        help="100-row pages stored per keyword up front")
+    parser.add_argument("--write-pages", type=int, default=5,
+                        help="distinct pages each writer cycles through")
+    parser.add_argument("--modes", nargs="+", default=list(MODES),
+                        choices=list(MODES))
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    keywords = [f"kw{i}" for i in range(args.keywords)]
+    header = (f"{'mode':<9}{'op':<8}{'ops':>7}{'ops/s':>9}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'locked':>8}")
+    print(header)
+    print("-" * len(header))
+    for mode in args.modes:
+        for r in run_mode(mode, keywords, args):
+            print(f"{r['mode']:<9}{r['op']:<8}{r['ops']:>7}"
+                  f"{r['ops_per_sec']:>9.1f}{r['p50_ms']:>9.1f}"
+                  f"{r['p95_ms']:>9.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
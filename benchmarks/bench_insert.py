@@ -0,0 +1,109 @@
+"""
+Insert micro-benchmark: rows/sec of the old pandas ingest path against the
+streaming executemany path used by stack_scraper.store_items.
+
+    python benchmarks/bench_insert.py
+    python benchmarks/bench_insert.py --sizes 100 1000 --repeat 5
+
+  pandas      parse → list of lists → pd.DataFrame → df.to_sql(append)
+  executemany generator of API items → insert_rows (one prepared statement)
+
+Both paths write the same rows: `questions`, `keyword_questions` and the
+high-water mark, in one transaction. Tags, metric snapshots and the keyword
+summary, which store_items also writes, are left out of both.
+Every run writes into a fresh temporary database.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+from mock_api import make_question  # noqa: E402
+from stack_db import (COLUMNS, QUESTION_COLUMNS, bump_high_water_mark,  # noqa: E402
+                      display_title, init_db, insert_rows)
+from stack_scraper import parse_item  # noqa: E402
+
+KEYWORD = "bench"
+SCRAPED_AT = 1_704_067_200     # 2024-01-01 UTC
+
+
+def make_items(n: int) -> list:
+    return [make_question(KEYWORD, i) for i in range(n)]
+
+
+def max_creation_ts(items: list):
+    """Newest `creation_date` (unix seconds) in a page of API items."""
+    stamps = [i["creation_date"] for i in items if i.get("creation_date")]
+    return max(stamps) if stamps else None
+
+
+def insert_pandas(conn, items):
+    """The pre-streaming path: build a DataFrame and append it with to_sql."""
+    start = time.perf_counter()
+    posts = [parse_item(item, KEYWORD, SCRAPED_AT) for item in items]
+    df = pd.DataFrame(posts, columns=COLUMNS)
+    df["updated_at"] = df["scraped_at"]
+    df["display_title"] = df["title"].map(display_title)
+    df[QUESTION_COLUMNS].to_sql("questions", conn, if_exists="append",
+                                index=False)
+    df[["keyword", "question_id", "scraped_at"]].to_sql(
+        "keyword_questions", conn, if_exists="append", index=False)
+    bump_high_water_mark(conn, KEYWORD, max_creation_ts(items))
+    conn.commit()
+    return time.perf_counter() - start
+
+
+def insert_executemany(conn, items):
+    """The streaming core of store_items: parse → insert_rows."""
+    start = time.perf_counter()
+    # a generator of rows, as store_items feeds it from a paging client
+    with conn:
+        insert_rows(conn, (parse_item(item, KEYWORD, SCRAPED_AT)
+                           for item in items))
+        bump_high_water_mark(conn, KEYWORD, max_creation_ts(items))
+    return time.perf_counter() - start
+
+
+def run(method, items, repeat: int) -> float:
+    """Best-of-`repeat` seconds, each run in a fresh database."""
+    best = float("inf")
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            init_db(db_path)
+            conn = sqlite3.connect(db_path)
+            try:
+                best = min(best, method(conn, items))
+            finally:
+                conn.close()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    header = (f"{'rows':>8}{'pandas rows/s':>16}{'executemany rows/s':>20}"
+              f"{'speedup':>9}")
+    print(header)
+    print("-" * len(header))
+    for n in args.sizes:
+        items = make_items(n)
+        old = run(insert_pandas, items, args.repeat)
+        new = run(insert_executemany, items, args.repeat)
+        print(f"{n:>8}{n / old:>16,.0f}{n / new:>20,.0f}{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
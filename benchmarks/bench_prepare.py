@@ -0,0 +1,150 @@
+"""
+prepare_df micro-benchmark: rows/sec of the old apply-based dashboard prep
+against the vectorized enrichment.prepare_df.
+
+    python benchmarks/bench_prepare.py
+    python benchmarks/bench_prepare.py --sizes 1000 100000 --repeat 5
+    python benchmarks/bench_prepare.py --workers 8
+
+  apply       per-row Python lambdas, full copy, filter at the end
+  vectorized  filter first, pandas string methods, each column built once
+  pool        vectorized, with unescaping and hashing on --workers processes
+
+Every version reads sentiment from the same title_sentiment cache, which is
+seeded with synthetic scores beforehand: the timings are a warm render,
+not a TextBlob run. Each size also checks that the outputs are identical.
+"""
+import argparse
+import functools
+import html
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+from enrichment import prepare_df  # noqa: E402
+from mock_api import make_question  # noqa: E402
+from sentiment_cache import _store, get_polarities, title_key  # noqa: E402
+from stack_db import COLUMNS, get_writer, init_db  # noqa: E402
+from stack_scraper import parse_item  # noqa: E402
+
+KEYWORD = "bench"
+SCRAPED_AT = 1_704_067_200     # 2024-01-01 UTC
+
+
+def make_frame(n: int) -> pd.DataFrame:
+    """n synthetic questions, with a few unusable rows for the filters."""
+    df = pd.DataFrame(
+        [parse_item(make_question(KEYWORD, i), KEYWORD, SCRAPED_AT)
+         for i in range(n)],
+        columns=COLUMNS,
+    )
+    df.loc[df.index[::997], "url"] = ""
+    df.loc[df.index[::1009], "author"] = None
+    return df
+
+
+def seed_sentiment(df: pd.DataFrame, db_path: str):
+    """Fill title_sentiment for every title without running TextBlob."""
+    rng = random.Random(0)
+    titles = df["title"].map(html.unescape).drop_duplicates()
+    scores = [(title_key(t), rng.uniform(-1, 1)) for t in titles]
+    get_writer(db_path).run(_store, scores)
+
+
+def prepare_apply(df: pd.DataFrame, db_path: str) -> pd.DataFrame:
+    """The previous app.prepare_df, kept verbatim as the baseline."""
+    df = df.copy()
+
+    df["Title"] = df["title"].apply(html.unescape)
+    df["Author"] = df["author"]
+    df["Score"] = df["score"]
+    df["URL"] = df["url"]
+
+    df["Title Length"] = df["Title"].apply(len)
+
+    df["Short Title"] = df["Title"].apply(
+        lambda x: x if len(x) <= 80 else x[:77] + "..."
+    )
+
+    df["ShortTitle"] = df["Short Title"]
+
+    df["Sentiment"] = get_polarities(df["Title"], db_path, workers=1)
+
+    if "creation_date" in df.columns:
+        df["Creation Date"] = pd.to_datetime(
+            df["creation_date"], unit="s", errors="coerce"
+        )
+        df["Creation Day"] = df["Creation Date"].dt.date
+
+    df["Hotness"] = (
+        df["Score"] * 1
+        + df["answer_count"] * 2
+        + df["view_count"] / 100
+    )
+
+    df = df.dropna(subset=["Title", "Author", "URL"])
+    df = df[df["URL"] != ""]
+    df = df.drop_duplicates(subset=["Title"], keep="first")
+
+    df["ShortShort"] = df["Short Title"].apply(
+        lambda s: s[:50] + "..." if len(s) > 50 else s
+    )
+
+    return df
+
+
+def run(method, df, db_path: str, repeat: int):
+    """Best-of-`repeat` seconds and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = method(df, db_path)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="also time a process pool of this size")
+    args = parser.parse_args()
+    serial = functools.partial(prepare_df, workers=1)
+    pool = functools.partial(prepare_df, workers=args.workers)
+
+    header = (f"{'rows':>9}{'apply rows/s':>15}{'vectorized rows/s':>19}"
+              f"{'speedup':>9}")
+    if args.workers > 1:
+        header += f"{'pool rows/s':>14}{'speedup':>9}"
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        init_db(db_path)
+        for n in args.sizes:
+            df = make_frame(n)
+            seed_sentiment(df, db_path)
+            old, expected = run(prepare_apply, df, db_path, args.repeat)
+            new, got = run(serial, df, db_path, args.repeat)
+            pd.testing.assert_frame_equal(got, expected)
+            line = (f"{n:>9}{n / old:>15,.0f}{n / new:>19,.0f}"
+                    f"{old / new:>8.1f}x")
+            if args.workers > 1:
+                par, got = run(pool, df, db_path, args.repeat)
+                pd.testing.assert_frame_equal(got, expected)
+                line += f"{n / par:>14,.0f}{old / par:>8.1f}x"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
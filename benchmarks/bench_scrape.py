@@ -0,0 +1,197 @@
+"""
+End-to-end scrape → store → render benchmark against the local mock API.
+
+    python benchmarks/bench_scrape.py
+    python benchmarks/bench_scrape.py --keywords 50 --pages 3 --latency 0.1
+    python benchmarks/bench_scrape.py --json results.json
+
+Runs in a throwaway working directory (so data/stack_questions.db is a
+fresh file) and reports keywords/sec, rows/sec and p50/p95 latency for:
+
+  scrape_keyword   one keyword at a time (stack_scraper.scrape_keyword)
+  scrape_many      all keywords concurrently (batch_scraper.scrape_many)
+  dashboard view   POST / rendering stored data (prepare_df + charts)
+  dashboard load   POST / → background job → re-render, end to end
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stack_scraper  # noqa: E402
+from api_scheduler import RequestScheduler  # noqa: E402
+from batch_scraper import scrape_many  # noqa: E402
+from mock_api import MockConfig, start_mock_server  # noqa: E402
+from stack_client import get_client  # noqa: E402
+from stack_db import init_db  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name, latencies, elapsed, n_keywords, n_rows):
+    return {
+        "name": name,
+        "keywords": n_keywords,
+        "rows": n_rows,
+        "seconds": elapsed,
+        "keywords_per_sec": n_keywords / elapsed if elapsed else 0.0,
+        "rows_per_sec": n_rows / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+# ============================================================
+# BENCHMARKS
+# ============================================================
+def bench_sequential(keywords, max_pages):
+    latencies, rows = [], 0
+    start = time.perf_counter()
+    for kw in keywords:
+        t0 = time.perf_counter()
+        stats = stack_scraper.scrape_keyword(kw, max_pages, full=True)
+        latencies.append(time.perf_counter() - t0)
+        rows += stats["rows"]
+    elapsed = time.perf_counter() - start
+    return summarize("scrape_keyword", latencies, elapsed, len(keywords), rows)
+
+
+def bench_batch(keywords, max_pages, concurrency):
+    start = time.perf_counter()
+    stats = scrape_many(keywords, concurrency, max_pages, full=True)
+    elapsed = time.perf_counter() - start
+    rows = sum(s["rows"] for s in stats.values())
+    # per-keyword latency is not observable inside one batch; report the
+    # batch wall time for both percentiles
+    return summarize(f"scrape_many (c={concurrency})", [elapsed], elapsed,
+                     len(stats), rows)
+
+
+def bench_dashboard_view(client, keywords):
+    latencies = []
+    start = time.perf_counter()
+    for kw in keywords:
+        t0 = time.perf_counter()
+        response = client.post("/", data={"keyword": kw, "action": "view"})
+        assert response.status_code == 200
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return summarize("dashboard view", latencies, elapsed, len(keywords), 0)
+
+
+def bench_dashboard_load(client, keywords, get_job):
+    latencies = []
+    start = time.perf_counter()
+    for kw in keywords:
+        t0 = time.perf_counter()
+        response = client.post("/", data={"keyword": kw, "action": "load"})
+        match = re.search(rb'name="job_id" value="(\w*)"', response.data)
+        job_id = match.group(1).decode() if match else ""
+        while job_id:
+            job = get_job(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                break
+            time.sleep(0.01)
+        client.post("/", data={"keyword": kw, "action": "view",
+                               "job_id": job_id})
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return summarize("dashboard load (e2e)", latencies, elapsed,
+                     len(keywords), 0)
+
+
+def print_report(results, server):
+    header = (f"{'benchmark':<24}{'kw':>5}{'rows':>8}{'kw/s':>9}"
+              f"{'rows/s':>10}{'p50 ms':>9}{'p95 ms':>9}")
+    print()
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['name']:<24}{r['keywords']:>5}{r['rows']:>8}"
+            f"{r['keywords_per_sec']:>9.1f}{r['rows_per_sec']:>10.0f}"
+            f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+        )
+    print(f"\nmock API: {server.requests} requests, {server.throttled} "
+          f"throttled, {server.bytes_sent / 1024:.0f} KiB sent")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--keywords", type=int, default=20,
+                        help="keywords per benchmark")
+    parser.add_argument("--pages", type=int, default=3,
+                        help="result pages per keyword")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="mock API latency in seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--backoff-every", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="scheduler requests/sec (default: unthrottled)")
+    parser.add_argument("--cache", action="store_true",
+                        help="keep the API response cache enabled")
+    parser.add_argument("--skip-dashboard", action="store_true")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    config = MockConfig(latency=args.latency, pages=args.pages,
+                        throttle_rate=args.throttle_rate,
+                        backoff_every=args.backoff_every)
+    server = start_mock_server(config)
+    stack_scraper.API_URL = f"{server.api_root}/search"
+
+    client = get_client()
+    client.scheduler = RequestScheduler(rate=args.rate, burst=int(args.rate))
+    if not args.cache:
+        client.cache = None
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="stack_bench_")
+    os.chdir(workdir)
+    init_db()
+
+    results = []
+    n = args.keywords
+    results.append(bench_sequential([f"seq{i}" for i in range(n)], args.pages))
+    results.append(bench_batch([f"batch{i}" for i in range(n)], args.pages,
+                               args.concurrency))
+
+    if not args.skip_dashboard:
+        warnings.filterwarnings("ignore")
+        import app
+        from jobs import get_job
+
+        flask_client = app.app.test_client()
+        results.append(bench_dashboard_view(
+            flask_client, [f"seq{i}" for i in range(n)]
+        ))
+        results.append(bench_dashboard_load(
+            flask_client, [f"e2e{i}" for i in range(n)], get_job
+        ))
+
+    print_report(results, server)
+    server.shutdown()
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Local stand-in for api.stackexchange.com, for offline benchmarks and dev.
+
+    python benchmarks/mock_api.py --port 8765 --latency 0.15 --pages 5
+    STACK_API_ROOT=http://127.0.0.1:8765/2.3 python app.py
+
+Serves synthetic /2.3/search and /2.3/questions/{ids} responses shaped like
+the real API (items, has_more, quota_*, backoff, error payloads), with
+configurable latency, result size, throttling and backoff.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+WORDS = [
+    "merge", "dictionary", "list", "string", "convert", "parse", "json",
+    "async", "thread", "loop", "class", "import", "error", "file", "read",
+    "write", "sort", "filter", "query", "index", "array", "regex", "date",
+]
+TAGS = [
+    "python", "pandas", "javascript", "java", "sql", "docker", "regex",
+    "numpy", "flask", "django", "git", "bash", "css", "html", "json",
+]
+BASE_CREATION_TS = 1_200_000_000   # 2008-01-10, first SO questions
+QUESTION_SPACING = 10_800          # seconds between synthetic questions
+
+
+# ============================================================
+# SYNTHETIC DATA
+# ============================================================
+def _seed(keyword: str) -> int:
+    return int(hashlib.md5(keyword.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def make_question(keyword: str, n: int) -> dict:
+    """Deterministic question #n for `keyword` (same input → same item)."""
+    rng = random.Random(_seed(keyword) * 100_003 + n)
+    qid = (_seed(keyword) % 1_000_000) * 10_000 + n
+    words = rng.sample(WORDS, rng.randint(3, 9))
+    title = f"How to {words[0]} {keyword} &amp; " + " ".join(words[1:]) + "?"
+    return {
+        "question_id": qid,
+        "title": title,
+        "owner": {"display_name": f"user{rng.randint(1, 400)}"},
+        "score": int(rng.paretovariate(1.2)) - 1,
+        "link": f"https://stackoverflow.com/questions/{qid}/mock",
+        "answer_count": rng.randint(0, 25),
+        "is_answered": rng.random() < 0.7,
+        "view_count": int(rng.paretovariate(0.8) * 50),
+        # newest question has the highest n
+        "creation_date": BASE_CREATION_TS + n * QUESTION_SPACING,
+        "tags": rng.sample(TAGS, rng.randint(1, 5)),
+    }
+
+
+# ============================================================
+# SERVER
+# ============================================================
+class MockConfig:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02,
+                 pages: int = 3, throttle_rate: float = 0.0,
+                 backoff_every: int = 0, backoff_seconds: int = 1,
+                 quota: int = 10_000):
+        self.latency = latency              # seconds added to every response
+        self.jitter = jitter                # +/- uniform random latency
+        self.pages = pages                  # result pages per keyword
+        self.throttle_rate = throttle_rate  # share of requests answered 502
+        self.backoff_every = backoff_every  # attach `backoff` every N requests
+        self.backoff_seconds = backoff_seconds
+        self.quota = quota
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"    # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        cfg = server.config
+        parts = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+
+        with server.lock:
+            server.requests += 1
+            n_request = server.requests
+            server.quota_remaining = max(0, server.quota_remaining - 1)
+            quota_remaining = server.quota_remaining
+
+        delay = cfg.latency + random.uniform(-cfg.jitter, cfg.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if random.random() < cfg.throttle_rate:
+            with server.lock:
+                server.throttled += 1
+            return self._send(400, {
+                "error_id": 502,
+                "error_name": "throttle_violation",
+                "error_message": "too many requests from this IP, "
+                                 "more requests available in 1 seconds",
+            })
+
+        if parts.path.rstrip("/") == "/2.3/search":
+            body = self._search(params)
+        elif parts.path.startswith("/2.3/questions/"):
+            body = self._questions(parts.path.rsplit("/", 1)[-1], params)
+        else:
+            return self._send(404, {"error_id": 404, "error_name": "no_method",
+                                    "error_message": "unknown method"})
+
+        body["quota_max"] = cfg.quota
+        body["quota_remaining"] = quota_remaining
+        if cfg.backoff_every and n_request % cfg.backoff_every == 0:
+            body["backoff"] = cfg.backoff_seconds
+        self._send(200, body)
+
+    def _search(self, params: dict) -> dict:
+        cfg = self.server.config
+        keyword = params.get("intitle", "")
+        page = max(1, int(params.get("page", 1)))
+        pagesize = min(100, max(1, int(params.get("pagesize", 30))))
+        total = cfg.pages * pagesize
+
+        # fromdate keeps question numbers whose creation_date is late enough
+        first = 0
+        fromdate = params.get("fromdate")
+        if fromdate:
+            since = int(fromdate) - BASE_CREATION_TS
+            first = max(0, -(-since // QUESTION_SPACING))   # ceil division
+        numbers = list(range(first, total))
+
+        # newest first unless asked for creation ascending
+        if not (params.get("sort") == "creation"
+                and params.get("order") == "asc"):
+            numbers.reverse()
+
+        start = (page - 1) * pagesize
+        page_items = [make_question(keyword, n)
+                      for n in numbers[start:start + pagesize]]
+        with self.server.lock:
+            for item in page_items:
+                self.server.known[item["question_id"]] = keyword
+        return {
+            "items": page_items,
+            "has_more": start + pagesize < len(numbers),
+        }
+
+    def _questions(self, ids: str, params: dict) -> dict:
+        items = []
+        for raw in ids.split(";"):
+            if raw.isdigit():
+                qid = int(raw)
+                with self.server.lock:
+                    keyword = self.server.known.get(qid, "mock")
+                items.append(make_question(keyword, qid % 10_000))
+        return {"items": items, "has_more": False}
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            payload = gzip.compress(payload)
+        with self.server.lock:
+            self.server.bytes_sent += len(payload)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self.quota_remaining = config.quota
+        self.known = {}     # question_id -> keyword, for /questions lookups
+
+    @property
+    def api_root(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/2.3"
+
+
+def start_mock_server(config: MockConfig = None, host: str = "127.0.0.1",
+                      port: int = 0) -> MockServer:
+    """Start a MockServer on a background thread (port 0 = any free port)."""
+    server = MockServer((host, port), config or MockConfig())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock StackExchange API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--backoff-every", type=int, default=0)
+    parser.add_argument("--backoff-seconds", type=int, default=1)
+    parser.add_argument("--quota", type=int, default=10_000)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.jitter, args.pages,
+                        args.throttle_rate, args.backoff_every,
+                        args.backoff_seconds, args.quota)
+    server = MockServer((args.host, args.port), config)
+    print(f"Mock StackExchange API on {server.api_root}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
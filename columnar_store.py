@@ -0,0 +1,239 @@
+"""
+Optional columnar mirror of `questions` for fast dashboard loads.
+
+One directory of Arrow IPC files per keyword under data/columnar/: a base
+file holding every row, plus one small part per later ingest holding only
+the rows that ingest touched. Readers memory-map the files with column
+projection and keep the newest copy of each question. Every part is
+compacted into a new base once MAX_PARTS have piled up, or when rows were
+deleted (which an appended part cannot express).
+
+File names carry `keywords.version` (bumped on every ingest of the
+keyword, or of any question it shares with another keyword):
+`base-<v>.arrow` covers everything up to v, `part-<p>-<v>.arrow` the rows
+stamped after p up to v (keyword_questions.version). A mirror whose files
+do not reach the current version is stale and callers fall back to SQLite.
+
+Needs pyarrow (`pip install pyarrow`). Without it, or with
+STACK_COLUMNAR=0, every function here is a no-op and returns None/False.
+"""
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+MIRROR_DIRNAME = "columnar"
+MAX_PARTS = 8          # appended parts kept before the next write compacts
+FILE_RE = re.compile(r"^(?:base|part-(\d+))-(\d+)\.arrow$")
+
+
+def enabled() -> bool:
+    return pa is not None and os.environ.get("STACK_COLUMNAR", "1") != "0"
+
+
+def mirror_dir(db_path: str) -> str:
+    """Mirror directory next to the SQLite file (data/columnar)."""
+    return os.path.join(os.path.dirname(db_path) or ".", MIRROR_DIRNAME)
+
+
+def partition_path(db_path: str, keyword: str) -> str:
+    """Directory holding `keyword`'s base file and parts."""
+    return os.path.join(mirror_dir(db_path),
+                        f"keyword={quote(keyword, safe='')}")
+
+
+def _state(conn: sqlite3.Connection, keyword: str):
+    """(version, row_count) of `keyword`, or None if it was never stored."""
+    return conn.execute(
+        "SELECT version, row_count FROM keywords WHERE keyword = ?",
+        (keyword,),
+    ).fetchone()
+
+
+def _chain(path: str):
+    """
+    (version covered, file names to read in order) for the mirror in
+    `path`: the newest base, then each part continuing from it. A gap
+    (a part starting past what is covered) ends the chain.
+    """
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return None, []
+    bases, parts = [], []
+    for name in names:
+        match = FILE_RE.match(name)
+        if not match:
+            continue
+        prev, version = match.groups()
+        if prev is None:
+            bases.append((int(version), name))
+        else:
+            parts.append((int(version), int(prev), name))
+    if not bases:
+        return None, []
+
+    covered, name = max(bases)
+    chain = [name]
+    for version, prev, name in sorted(parts):
+        if version <= covered:
+            continue
+        if prev > covered:
+            break
+        chain.append(name)
+        covered = version
+    return covered, chain
+
+
+def _column_names(path: str) -> list:
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+# ============================================================
+# WRITE
+# ============================================================
+def write_partition(conn: sqlite3.Connection, db_path: str, keyword: str,
+                    compact: bool = False) -> bool:
+    """
+    Bring `keyword`'s mirror up to date: append the rows stamped since the
+    last file as a new part, or (when there is no base yet, MAX_PARTS are
+    reached, rows were removed or `compact` is set) write a fresh base and
+    drop the older files. Files appear atomically, via rename. Returns
+    False when the mirror is disabled or the keyword has no rows.
+    """
+    if not enabled():
+        return False
+
+    path = partition_path(db_path, keyword)
+    covered, chain = _chain(path)
+    full = compact or covered is None or len(chain) > MAX_PARTS
+
+    # version and rows from one read snapshot, so a part holds exactly
+    # the rows stamped up to the version in its name
+    own = not conn.in_transaction
+    if own:
+        conn.execute("BEGIN")
+    try:
+        state = _state(conn, keyword)
+        if state is None:
+            return False
+        version = state[0]
+        if not full and version == covered:
+            return True
+        query = """
+            SELECT kq.keyword, kq.scraped_at, q.*
+            FROM keyword_questions kq
+            JOIN questions q ON q.question_id = kq.question_id
+            WHERE kq.keyword = ?
+        """
+        params = [keyword]
+        if not full:
+            query += " AND kq.version > ?"
+            params.append(covered)
+        cursor = conn.execute(query + " ORDER BY kq.question_id", params)
+        names = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
+    finally:
+        if own:
+            conn.commit()
+
+    if not full and (
+        not rows or names != _column_names(os.path.join(path, chain[-1]))
+    ):
+        # a version bump without stamped rows means rows were removed;
+        # a schema change means parts no longer line up with the base
+        return write_partition(conn, db_path, keyword, compact=True)
+    if not rows:
+        return False
+
+    table = pa.table(
+        {name: pa.array(values) for name, values in zip(names, zip(*rows))}
+    )
+    name = (f"base-{version}.arrow" if full
+            else f"part-{covered}-{version}.arrow")
+    os.makedirs(path, exist_ok=True)
+    tmp_path = os.path.join(
+        path, f"{name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, os.path.join(path, name))
+
+    if full:
+        # everything up to `version` now lives in the new base
+        for old in os.listdir(path):
+            match = FILE_RE.match(old)
+            if old != name and match and int(match.group(2)) <= version:
+                _remove(os.path.join(path, old))
+        _remove(f"{path}.arrow")          # single-file layout of old releases
+    return True
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def clear(db_path: str):
+    """Delete every mirror file for `db_path`."""
+    shutil.rmtree(mirror_dir(db_path), ignore_errors=True)
+
+
+# ============================================================
+# READ
+# ============================================================
+def read_partition(conn: sqlite3.Connection, db_path: str, keyword: str,
+                   columns=None):
+    """
+    `keyword`'s rows as a DataFrame (only `columns`, if given), or None if
+    the mirror is disabled, missing, stale or lacks a requested column.
+    """
+    if not enabled():
+        return None
+    path = partition_path(db_path, keyword)
+    covered, chain = _chain(path)
+    state = _state(conn, keyword)
+    if covered is None or state is None or covered != state[0]:
+        return None
+
+    wanted = list(columns) if columns else None
+    if wanted and len(chain) > 1 and "question_id" not in wanted:
+        wanted.append("question_id")
+    try:
+        tables = []
+        for name in chain:
+            with pa.memory_map(os.path.join(path, name)) as source:
+                table = pa.ipc.open_file(source).read_all()
+            if wanted:
+                if not set(wanted) <= set(table.column_names):
+                    return None
+                table = table.select(wanted)
+            tables.append(table)
+        table = pa.concat_tables(tables, promote_options="default")
+    except (OSError, pa.ArrowInvalid) as e:
+        # e.g. a compaction removed a file between listing and reading
+        print(f"Columnar mirror unreadable for '{keyword}': {e}")
+        return None
+
+    df = table.to_pandas()
+    if len(chain) > 1:
+        # a question touched again lives on in the newest part
+        df = (df.drop_duplicates("question_id", keep="last")
+                .sort_values("question_id", kind="stable")
+                .reset_index(drop=True))
+        if columns and "question_id" not in columns:
+            df = df.drop(columns="question_id")
+    if len(df) != state[1]:
+        return None
+    return df
@@ -0,0 +1,368 @@
+"""
+Database maintenance: retention, compaction and incremental VACUUM.
+
+    python db_maintenance.py                    # dedupe, reindex, vacuum
+    python db_maintenance.py --max-age-days 180 --keep python=0 --keep flask=30
+    python db_maintenance.py --max-rows 5000 --metrics-days 90
+    python db_maintenance.py --enable-incremental-vacuum   # one-off, blocking
+
+Steps, in order:
+
+  dedupe     unlink legacy rows without a question id whose URL is also
+             stored under its real id
+  retention  unlink questions a keyword has not re-scraped within
+             --max-age-days (per-keyword overrides with --keep KEYWORD=DAYS,
+             0 = keep forever) and all but its newest --max-rows questions
+  metrics    drop question_metrics snapshots older than --metrics-days,
+             keeping each question's latest one
+  orphans    drop questions no keyword links to any more, with their tags
+             and snapshots; recount `keywords`
+  reindex    rebuild indexes one at a time, refresh planner statistics
+  vacuum     PRAGMA incremental_vacuum in small steps, then truncate the WAL
+
+Deletes run in small batches through the process's single writer, each its
+own short transaction with a pause in between, so this can run while the
+dashboard is serving.
+"""
+import argparse
+import os
+import time
+
+from stack_db import DB_PATH, get_conn, get_writer, init_db, refresh_mirror
+
+DEFAULT_BATCH_SIZE = 2_000
+DEFAULT_VACUUM_PAGES = 1_000     # pages released per incremental_vacuum step
+PAUSE_SECONDS = 0.05             # between batches, lets other writers in
+
+
+def db_size(db_path: str) -> int:
+    """Bytes on disk for the database plus its WAL."""
+    return sum(
+        os.path.getsize(p) for p in (db_path, f"{db_path}-wal")
+        if os.path.exists(p)
+    )
+
+
+def _delete_batch(conn, table: str, key: str, where: str, params,
+                  batch_size: int) -> int:
+    # `key` may be a row value such as "(question_id, ts)"
+    with conn:
+        return conn.execute(
+            f"DELETE FROM {table} WHERE {key} IN "
+            f"(SELECT {key.strip('()')} FROM {table} WHERE {where} LIMIT ?)",
+            (*params, batch_size),
+        ).rowcount
+
+
+def delete_in_batches(db_path: str, table: str, where: str, params=(),
+                      key: str = "rowid",
+                      batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """DELETE ... WHERE `where`, `batch_size` rows per transaction."""
+    writer = get_writer(db_path)
+    total = 0
+    while True:
+        n = writer.run(_delete_batch, table, key, where, params, batch_size)
+        total += n
+        if n < batch_size:
+            return total
+        time.sleep(PAUSE_SECONDS)
+
+
+# ============================================================
+# STEPS
+# ============================================================
+def dedupe_questions(db_path: str, batch_size: int) -> int:
+    """
+    Links to migrated rows that never had a question_id (stored under a
+    negative id) when the same URL is also stored under its real id.
+    """
+    return delete_in_batches(
+        db_path, "keyword_questions",
+        """
+        question_id < 0 AND EXISTS (
+            SELECT 1 FROM questions legacy
+            JOIN questions q ON q.url = legacy.url AND q.question_id > 0
+            WHERE legacy.question_id = keyword_questions.question_id
+        )
+        """,
+        key="(keyword, question_id)", batch_size=batch_size,
+    )
+
+
+def apply_retention(db_path: str, max_age_days: float, keep: dict,
+                    max_rows: int, batch_size: int) -> dict:
+    """{keyword: questions unlinked} under the age and row-count policies."""
+    keywords = [row[0] for row in
+                get_conn(db_path).execute("SELECT keyword FROM keywords")]
+    now = int(time.time())
+    deleted = {}
+    for keyword in keywords:
+        days = keep.get(keyword, max_age_days)
+        n = 0
+        if days:
+            n += delete_in_batches(
+                db_path, "keyword_questions", "keyword = ? AND scraped_at < ?",
+                (keyword, now - int(days * 86_400)),
+                key="(keyword, question_id)", batch_size=batch_size,
+            )
+        if max_rows:
+            n += delete_in_batches(
+                db_path, "keyword_questions",
+                """
+                keyword = ? AND question_id NOT IN (
+                    SELECT kq.question_id FROM keyword_questions kq
+                    JOIN questions q ON q.question_id = kq.question_id
+                    WHERE kq.keyword = ?
+                    ORDER BY q.creation_date DESC LIMIT ?
+                )
+                """,
+                (keyword, keyword, max_rows),
+                key="(keyword, question_id)", batch_size=batch_size,
+            )
+        if n:
+            deleted[keyword] = n
+    return deleted
+
+
+def prune_metrics(db_path: str, metrics_days: float, batch_size: int) -> int:
+    """Old snapshots, always keeping the newest one per question."""
+    cutoff = int(time.time() - metrics_days * 86_400)
+    return delete_in_batches(
+        db_path, "question_metrics",
+        """
+        ts < ? AND ts < (
+            SELECT MAX(m.ts) FROM question_metrics m
+            WHERE m.question_id = question_metrics.question_id
+        )
+        """,
+        (cutoff,), key="(question_id, ts)", batch_size=batch_size,
+    )
+
+
+def _resync_keywords(conn, keywords):
+    with conn:
+        for keyword in keywords:
+            conn.execute(
+                """
+                UPDATE keywords SET
+                    row_count = (SELECT COUNT(*) FROM keyword_questions
+                                 WHERE keyword = ?),
+                    version = version + 1
+                WHERE keyword = ?
+                """,
+                (keyword, keyword),
+            )
+        conn.execute("DELETE FROM keywords WHERE row_count = 0")
+
+
+def prune_orphans(db_path: str, touched, batch_size: int) -> int:
+    """
+    Questions no keyword links to, then tags and snapshots of missing
+    questions; recount touched keywords.
+    """
+    n = delete_in_batches(
+        db_path, "questions",
+        """
+        NOT EXISTS (
+            SELECT 1 FROM keyword_questions kq
+            WHERE kq.question_id = questions.question_id
+        )
+        """,
+        key="question_id", batch_size=batch_size,
+    )
+    n += delete_in_batches(
+        db_path, "question_tags",
+        """
+        NOT EXISTS (
+            SELECT 1 FROM questions q
+            WHERE q.question_id = question_tags.question_id
+        )
+        """,
+        key="(question_id, tag)", batch_size=batch_size,
+    )
+    n += delete_in_batches(
+        db_path, "question_metrics",
+        """
+        NOT EXISTS (
+            SELECT 1 FROM questions q
+            WHERE q.question_id = question_metrics.question_id
+        )
+        """,
+        key="(question_id, ts)", batch_size=batch_size,
+    )
+    if touched:
+        get_writer(db_path).run(_resync_keywords, list(touched))
+        for keyword in touched:
+            refresh_mirror(keyword, db_path, compact=True)
+    return n
+
+
+def _reindex(conn, name: str):
+    conn.execute(f'REINDEX "{name}"')
+
+
+def _optimize(conn):
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+
+
+def reindex(db_path: str) -> int:
+    """Rebuild each index in its own transaction, then refresh statistics."""
+    names = [row[0] for row in get_conn(db_path).execute(
+        "SELECT name FROM sqlite_master "
+        "WHERE type = 'index' AND sql IS NOT NULL"
+    )]
+    writer = get_writer(db_path)
+    for name in names:
+        writer.run(_reindex, name)
+        time.sleep(PAUSE_SECONDS)
+    writer.run(_optimize)
+    return len(names)
+
+
+def _incremental_vacuum(conn, pages: int) -> int:
+    # executescript steps the pragma to completion (execute() frees 1 page)
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def _checkpoint(conn):
+    return conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+
+
+def vacuum(db_path: str, pages: int = DEFAULT_VACUUM_PAGES) -> int:
+    """
+    Release free pages `pages` at a time and truncate the WAL. Returns the
+    pages released (0 when the file was created without incremental
+    auto-vacuum; see --enable-incremental-vacuum).
+    """
+    conn = get_conn(db_path)
+    writer = get_writer(db_path)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        print(f"  auto_vacuum is off: {free} free pages stay in the file "
+              "(run once with --enable-incremental-vacuum)")
+        writer.run(_checkpoint)
+        return 0
+
+    released = 0
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    while free:
+        remaining = writer.run(_incremental_vacuum, pages)
+        released += free - remaining
+        if remaining >= free:
+            break
+        free = remaining
+        time.sleep(PAUSE_SECONDS)
+    writer.run(_checkpoint)
+    return released
+
+
+def _full_vacuum(conn):
+    # stack_db connections ask for auto_vacuum=INCREMENTAL; VACUUM applies it
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def enable_incremental_vacuum(db_path: str):
+    """One-off blocking VACUUM that switches the file to incremental mode."""
+    get_writer(db_path).run(_full_vacuum)
+
+
+# ============================================================
+# ENTRY POINTS
+# ============================================================
+def run_maintenance(db_path: str = None, max_age_days: float = 0,
+                    keep: dict = None, max_rows: int = 0,
+                    metrics_days: float = 0,
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    vacuum_pages: int = DEFAULT_VACUUM_PAGES) -> dict:
+    """Run every step; returns a report dict (rows deleted, bytes freed)."""
+    db_path = db_path or DB_PATH
+    init_db(db_path)
+    before = db_size(db_path)
+    start = time.perf_counter()
+    report = {}
+
+    report["duplicates"] = dedupe_questions(db_path, batch_size)
+    retention = apply_retention(db_path, max_age_days, keep or {}, max_rows,
+                                batch_size)
+    report["expired"] = sum(retention.values())
+    report["snapshots"] = (prune_metrics(db_path, metrics_days, batch_size)
+                           if metrics_days else 0)
+    touched = set(retention)
+    if report["duplicates"]:
+        touched.update(row[0] for row in
+                       get_conn(db_path).execute("SELECT keyword FROM keywords"))
+    report["orphans"] = prune_orphans(db_path, touched, batch_size)
+    report["indexes"] = reindex(db_path)
+    report["pages_released"] = vacuum(db_path, vacuum_pages)
+
+    report["bytes_before"] = before
+    report["bytes_after"] = db_size(db_path)
+    report["bytes_reclaimed"] = before - report["bytes_after"]
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def parse_keep(values) -> dict:
+    keep = {}
+    for value in values or []:
+        keyword, _, days = value.rpartition("=")
+        if not keyword:
+            raise argparse.ArgumentTypeError(
+                f"--keep expects KEYWORD=DAYS, got '{value}'"
+            )
+        keep[keyword] = float(days)
+    return keep
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compact and clean up the questions database."
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--max-age-days", type=float, default=0,
+                        help="drop questions not re-scraped for this long "
+                             "(0 = keep forever)")
+    parser.add_argument("--keep", action="append", metavar="KEYWORD=DAYS",
+                        help="per-keyword override of --max-age-days")
+    parser.add_argument("--max-rows", type=int, default=0,
+                        help="keep only the newest N questions per keyword")
+    parser.add_argument("--metrics-days", type=float, default=0,
+                        help="drop metric snapshots older than this "
+                             "(the latest per question is kept)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--vacuum-pages", type=int,
+                        default=DEFAULT_VACUUM_PAGES)
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="one-off full VACUUM (blocks writers) that "
+                             "turns on incremental vacuum for this file")
+    args = parser.parse_args()
+
+    if args.enable_incremental_vacuum:
+        before = db_size(args.db)
+        enable_incremental_vacuum(args.db)
+        print(f"Incremental vacuum enabled; reclaimed "
+              f"{(before - db_size(args.db)) / 1024:.0f} KiB")
+        return
+
+    report = run_maintenance(args.db, args.max_age_days,
+                             parse_keep(args.keep), args.max_rows,
+                             args.metrics_days, args.batch_size,
+                             args.vacuum_pages)
+    print(
+        f"Removed {report['duplicates']} duplicate, {report['expired']} "
+        f"expired, {report['snapshots']} snapshot and {report['orphans']} "
+        f"orphan rows; rebuilt {report['indexes']} indexes; released "
+        f"{report['pages_released']} pages in {report['seconds']:.1f}s"
+    )
+    print(
+        f"Database size {report['bytes_before'] / 1024:.0f} KiB → "
+        f"{report['bytes_after'] / 1024:.0f} KiB "
+        f"({report['bytes_reclaimed'] / 1024:.0f} KiB reclaimed)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,683 @@
+"""
+Versioned schema migrations for the questions database.
+
+    python db_migrations.py                    # migrate data/stack_questions.db
+    python db_migrations.py --status
+    python db_migrations.py --db other.db --batch-size 20000
+
+The schema version lives in PRAGMA user_version. stack_db.init_db() runs
+pending migrations automatically; this CLI does the same with a chosen
+batch size. Large tables are copied in batches, each in its own short
+transaction, so readers and writers keep working between batches and only
+the final swap holds the write lock. An interrupted migration resumes where
+it stopped.
+
+  v1  timestamps as INTEGER epoch seconds (scraped_at, creation_date,
+      last_seen, last_fetched_at, last_viewed_at), is_answered as a 0/1
+      integer, a version counter on `keywords`, date range indexes; rows
+      of append-only scrapes get their question_id from the URL and lose
+      their older duplicates, and an empty `keywords` table is filled
+  v2  one `questions` row per question (keyed by question_id) plus a
+      `keyword_questions` mapping, instead of a copy per keyword; tags
+      per question; an empty `question_metrics` is seeded with each
+      question's stored metrics
+  v3  `display_title` (HTML-unescaped title, filled in batches) and chart
+      values as generated columns: hotness, title_length, short_title,
+      axis_label; the search index rebuilt over display_title
+  v4  a `version` per keyword_questions row, so columnar mirror writes
+      append only the rows an ingest changed
+"""
+import argparse
+import html
+import sqlite3
+import time
+
+SCHEMA_VERSION = 4
+DEFAULT_BATCH_SIZE = 5_000
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def set_version(conn: sqlite3.Connection, version: int):
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def epoch_sql(column: str) -> str:
+    """SQL turning ISO-8601 text, digit strings or numbers into epoch ints."""
+    return (
+        f"CASE WHEN {column} IS NULL THEN NULL "
+        f"WHEN typeof({column}) IN ('integer', 'real') "
+        f"THEN CAST({column} AS INTEGER) "
+        f"WHEN {column} GLOB '[0-9]*' AND {column} NOT GLOB '*[^0-9]*' "
+        f"THEN CAST({column} AS INTEGER) "
+        f"ELSE CAST(strftime('%s', {column}) AS INTEGER) END"
+    )
+
+
+def question_id_sql(column: str) -> str:
+    """SQL for the id in a .../questions/<id>/... URL (NULL if none)."""
+    return (
+        f"CASE WHEN instr({column}, '/questions/') > 0 THEN nullif(CAST("
+        f"substr({column}, instr({column}, '/questions/') + 11) "
+        f"AS INTEGER), 0) END"
+    )
+
+
+def _begin(conn: sqlite3.Connection):
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+
+
+def drop_search_index(conn: sqlite3.Connection):
+    """Drop the questions_fts index and its triggers; init_db rebuilds them."""
+    for trigger in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS questions_fts_{trigger}")
+    conn.execute("DROP TABLE IF EXISTS questions_fts")
+
+
+def _rebuild(conn: sqlite3.Connection, table: str, create_sql: str,
+             select_sql: str):
+    """Swap `table` for a retyped copy (caller holds the transaction)."""
+    conn.execute(f"DROP TABLE IF EXISTS {table}_v1")
+    conn.execute(create_sql.format(table=f"{table}_v1"))
+    conn.execute(f"INSERT INTO {table}_v1 {select_sql}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_v1 RENAME TO {table}")
+
+
+# ============================================================
+# v1: TYPED TIMESTAMPS
+# ============================================================
+V1_QUESTIONS = """
+    CREATE TABLE IF NOT EXISTS questions_v1 (
+        id INTEGER PRIMARY KEY,
+        keyword TEXT,
+        scraped_at INTEGER,
+        title TEXT,
+        author TEXT,
+        score INTEGER,
+        url TEXT,
+        answer_count INTEGER,
+        is_answered INTEGER NOT NULL DEFAULT 0,
+        view_count INTEGER,
+        creation_date INTEGER,
+        tags TEXT,
+        question_id INTEGER
+    )
+"""
+
+# rows of append-only scrapes have no question_id yet; the URL has it.
+# Rows are copied in id order, so a repeat of (keyword, question_id)
+# replaces the older copy
+V1_COPY = f"""
+    INSERT OR REPLACE INTO questions_v1
+    SELECT id, keyword, {epoch_sql('scraped_at')}, title, author, score, url,
+           answer_count,
+           CASE WHEN is_answered IN (1, '1', 'True', 'true') THEN 1 ELSE 0 END,
+           view_count, {epoch_sql('creation_date')}, tags,
+           coalesce(question_id, {question_id_sql('url')})
+    FROM questions
+"""
+
+# summary rows for databases that predate the `keywords` table (see
+# _backfill); row_count is recounted by the v2 migration
+V1_KEYWORDS = """
+    INSERT INTO keywords (keyword, last_seen, row_count)
+    SELECT keyword, MAX(scraped_at), COUNT(*) FROM questions_v1
+    WHERE keyword IS NOT NULL AND {where}
+    GROUP BY keyword
+    ON CONFLICT(keyword) DO UPDATE SET
+        last_seen = max(coalesce(last_seen, 0), excluded.last_seen),
+        row_count = row_count + excluded.row_count
+"""
+
+
+def _start_backfill(conn: sqlite3.Connection, *tables):
+    """
+    Remember which of `tables` (added after the database was created) are
+    still empty, so later batches fill them even after an interruption.
+    Caller holds the transaction.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master "
+        "WHERE type = 'table' AND name = '_migration_backfill'"
+    ).fetchone()
+    if exists:
+        return
+    conn.execute("CREATE TABLE _migration_backfill (name TEXT PRIMARY KEY)")
+    for table in tables:
+        if not conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+            conn.execute("INSERT INTO _migration_backfill VALUES (?)",
+                         (table,))
+
+
+def _backfill(conn: sqlite3.Connection, table: str) -> bool:
+    """Whether `table` is being filled by the running migration."""
+    try:
+        return conn.execute(
+            "SELECT 1 FROM _migration_backfill WHERE name = ?", (table,)
+        ).fetchone() is not None
+    except sqlite3.OperationalError:      # no backfill pending
+        return False
+
+
+def _v1_typed_timestamps(conn: sqlite3.Connection, batch_size: int):
+    # 1. new table + a trigger that remembers rows updated mid-copy
+    _begin(conn)
+    if get_version(conn) >= 1:
+        conn.rollback()
+        return
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(questions)")}
+    if "question_id" not in columns:
+        # the copy derives it from the URL
+        conn.execute("ALTER TABLE questions ADD COLUMN question_id INTEGER")
+    _start_backfill(conn, "keywords", "question_metrics")
+    conn.execute(V1_QUESTIONS)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS _migration_dirty (id INTEGER PRIMARY KEY)"
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS _migration_questions_updated
+        AFTER UPDATE ON questions
+        BEGIN
+            INSERT OR IGNORE INTO _migration_dirty (id) VALUES (new.id);
+        END
+        """
+    )
+    # range indexes are built on the new table as it fills
+    conn.execute("DROP INDEX IF EXISTS idx_questions_keyword_created")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_questions_keyword_created "
+        "ON questions_v1 (keyword, creation_date)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_questions_creation_date "
+        "ON questions_v1 (creation_date)"
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_v1_keyword_qid "
+        "ON questions_v1 (keyword, question_id)"
+    )
+    conn.commit()
+
+    # 2. copy in id order, one short transaction per batch
+    last_id = conn.execute(
+        "SELECT coalesce(MAX(id), 0) FROM questions_v1"
+    ).fetchone()[0]
+    total = conn.execute(
+        "SELECT COUNT(*) FROM questions WHERE id > ?", (last_id,)
+    ).fetchone()[0]
+    copied = 0
+    start = last_report = time.perf_counter()
+    while True:
+        _begin(conn)
+        if get_version(conn) >= 1:       # another process finished first
+            conn.rollback()
+            return
+        upper = conn.execute(
+            "SELECT MAX(id) FROM "
+            "(SELECT id FROM questions WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_size),
+        ).fetchone()[0]
+        if upper is None:
+            conn.rollback()
+            break
+        copied += conn.execute(V1_COPY + " WHERE id > ? AND id <= ?",
+                               (last_id, upper)).rowcount
+        if _backfill(conn, "keywords"):
+            conn.execute(V1_KEYWORDS.format(where="id > ? AND id <= ?"),
+                         (last_id, upper))
+        conn.commit()
+        last_id = upper
+        if time.perf_counter() - last_report >= 1:
+            last_report = time.perf_counter()
+            print(f"  migrating questions: {copied}/{total} rows "
+                  f"({last_report - start:.1f}s)")
+
+    # 3. catch up and swap in one transaction
+    _begin(conn)
+    try:
+        if get_version(conn) >= 1:
+            conn.rollback()
+            return
+        conn.execute(V1_COPY + " WHERE id > ?", (last_id,))
+        conn.execute(V1_COPY + " WHERE id IN (SELECT id FROM _migration_dirty)")
+        if _backfill(conn, "keywords"):
+            conn.execute(V1_KEYWORDS.format(where="id > ?"), (last_id,))
+            conn.execute("DELETE FROM _migration_backfill "
+                         "WHERE name = 'keywords'")
+        conn.execute("DROP TABLE questions")
+        conn.execute("ALTER TABLE questions_v1 RENAME TO questions")
+        conn.execute("DROP TABLE _migration_dirty")
+
+        _rebuild(
+            conn, "keywords",
+            """
+            CREATE TABLE {table} (
+                keyword TEXT PRIMARY KEY,
+                last_seen INTEGER,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            f"SELECT keyword, {epoch_sql('last_seen')}, row_count, 0 "
+            "FROM keywords",
+        )
+        _rebuild(
+            conn, "scrape_state",
+            """
+            CREATE TABLE {table} (
+                keyword TEXT PRIMARY KEY,
+                max_creation_date INTEGER,
+                last_fetched_at INTEGER
+            )
+            """,
+            f"SELECT keyword, max_creation_date, "
+            f"{epoch_sql('last_fetched_at')} FROM scrape_state",
+        )
+        _rebuild(
+            conn, "keyword_views",
+            """
+            CREATE TABLE {table} (
+                keyword TEXT PRIMARY KEY,
+                views INTEGER NOT NULL DEFAULT 0,
+                last_viewed_at INTEGER
+            )
+            """,
+            f"SELECT keyword, views, {epoch_sql('last_viewed_at')} "
+            "FROM keyword_views",
+        )
+        set_version(conn, 1)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    print(f"  migrated {copied} questions in "
+          f"{time.perf_counter() - start:.1f}s")
+
+
+# ============================================================
+# v2: SHARED QUESTIONS + KEYWORD MAPPING
+# ============================================================
+V2_QUESTIONS = """
+    CREATE TABLE IF NOT EXISTS questions_v2 (
+        question_id INTEGER PRIMARY KEY,
+        title TEXT,
+        author TEXT,
+        score INTEGER,
+        url TEXT,
+        answer_count INTEGER,
+        is_answered INTEGER NOT NULL DEFAULT 0,
+        view_count INTEGER,
+        creation_date INTEGER,
+        tags TEXT,
+        updated_at INTEGER
+    )
+"""
+
+V2_KEYWORD_QUESTIONS = """
+    CREATE TABLE IF NOT EXISTS keyword_questions (
+        keyword TEXT NOT NULL,
+        question_id INTEGER NOT NULL,
+        scraped_at INTEGER,
+        PRIMARY KEY (keyword, question_id)
+    ) WITHOUT ROWID
+"""
+
+# rows that never got a question_id keep their old row id, negated
+V2_COPY = """
+    INSERT INTO questions_v2
+        (question_id, title, author, score, url, answer_count, is_answered,
+         view_count, creation_date, tags, updated_at)
+    SELECT coalesce(question_id, -id), title, author, score, url,
+           answer_count, is_answered, view_count, creation_date, tags,
+           scraped_at
+    FROM questions
+    WHERE {where}
+    ON CONFLICT(question_id) DO UPDATE SET
+        title = excluded.title, author = excluded.author,
+        score = excluded.score, url = excluded.url,
+        answer_count = excluded.answer_count,
+        is_answered = excluded.is_answered,
+        view_count = excluded.view_count,
+        creation_date = excluded.creation_date, tags = excluded.tags,
+        updated_at = excluded.updated_at
+    WHERE coalesce(excluded.updated_at, 0)
+          >= coalesce(questions_v2.updated_at, 0)
+"""
+
+V2_LINK = """
+    INSERT INTO keyword_questions (keyword, question_id, scraped_at)
+    SELECT keyword, coalesce(question_id, -id), scraped_at
+    FROM questions
+    WHERE keyword IS NOT NULL AND {where}
+    ON CONFLICT(keyword, question_id) DO UPDATE SET
+        scraped_at = max(coalesce(scraped_at, 0),
+                         coalesce(excluded.scraped_at, 0))
+"""
+
+# "a,b,c" → one (question_id, tag) row per tag
+V2_TAGS = """
+    WITH RECURSIVE split(question_id, tag, rest) AS (
+        SELECT question_id, '', tags || ',' FROM questions
+        WHERE coalesce(tags, '') != ''
+        UNION ALL
+        SELECT question_id, substr(rest, 1, instr(rest, ',') - 1),
+               substr(rest, instr(rest, ',') + 1)
+        FROM split WHERE rest != ''
+    )
+    INSERT OR IGNORE INTO question_tags_v2 (question_id, tag)
+    SELECT question_id, tag FROM split WHERE tag != ''
+"""
+
+
+# databases that predate `question_metrics` start it with each question's
+# newest stored metrics (rows without a real question_id are skipped)
+V2_METRICS = """
+    INSERT OR IGNORE INTO question_metrics
+        (question_id, ts, score, answer_count, view_count)
+    SELECT question_id, updated_at, score, answer_count, view_count
+    FROM questions_v2
+    WHERE question_id > ? AND question_id <= ? AND updated_at IS NOT NULL
+"""
+
+
+def _v2_copy(conn: sqlite3.Connection, where: str, params=()) -> int:
+    n = conn.execute(V2_COPY.format(where=where), params).rowcount
+    conn.execute(V2_LINK.format(where=where), params)
+    return n
+
+
+def _v2_shared_questions(conn: sqlite3.Connection, batch_size: int):
+    # 1. new tables + a trigger that remembers rows updated mid-copy
+    _begin(conn)
+    if get_version(conn) >= 2:
+        conn.rollback()
+        return
+    conn.execute(V2_QUESTIONS)
+    conn.execute(V2_KEYWORD_QUESTIONS)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS _migration_dirty (id INTEGER PRIMARY KEY)"
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS _migration_questions_updated
+        AFTER UPDATE ON questions
+        BEGIN
+            INSERT OR IGNORE INTO _migration_dirty (id) VALUES (new.id);
+        END
+        """
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS _migration_progress "
+                 "(last_id INTEGER NOT NULL)")
+    conn.commit()
+
+    # 2. copy in id order, one short transaction per batch
+    row = conn.execute("SELECT last_id FROM _migration_progress").fetchone()
+    last_id = row[0] if row else 0
+    total = conn.execute(
+        "SELECT COUNT(*) FROM questions WHERE id > ?", (last_id,)
+    ).fetchone()[0]
+    copied = 0
+    start = last_report = time.perf_counter()
+    while True:
+        _begin(conn)
+        if get_version(conn) >= 2:       # another process finished first
+            conn.rollback()
+            return
+        upper = conn.execute(
+            "SELECT MAX(id) FROM "
+            "(SELECT id FROM questions WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_size),
+        ).fetchone()[0]
+        if upper is None:
+            conn.rollback()
+            break
+        copied += _v2_copy(conn, "id > ? AND id <= ?", (last_id, upper))
+        conn.execute("DELETE FROM _migration_progress")
+        conn.execute("INSERT INTO _migration_progress VALUES (?)", (upper,))
+        conn.commit()
+        last_id = upper
+        if time.perf_counter() - last_report >= 1:
+            last_report = time.perf_counter()
+            print(f"  migrating questions: {copied}/{total} rows "
+                  f"({last_report - start:.1f}s)")
+
+    # 3. seed metrics from the merged questions, in question_id order
+    # (re-seeding after an interruption is harmless: INSERT OR IGNORE)
+    after = 0
+    seeded = 0
+    while _backfill(conn, "question_metrics"):
+        _begin(conn)
+        if get_version(conn) >= 2:
+            conn.rollback()
+            return
+        upper = conn.execute(
+            "SELECT MAX(question_id) FROM (SELECT question_id FROM "
+            "questions_v2 WHERE question_id > ? ORDER BY question_id LIMIT ?)",
+            (after, batch_size),
+        ).fetchone()[0]
+        if upper is None:
+            conn.execute("DELETE FROM _migration_backfill "
+                         "WHERE name = 'question_metrics'")
+            conn.commit()
+            break
+        seeded += conn.execute(V2_METRICS, (after, upper)).rowcount
+        conn.commit()
+        after = upper
+        if time.perf_counter() - last_report >= 1:
+            last_report = time.perf_counter()
+            print(f"  seeding metrics: {seeded} questions "
+                  f"({last_report - start:.1f}s)")
+
+    # 4. catch up and swap in one transaction
+    _begin(conn)
+    try:
+        if get_version(conn) >= 2:
+            conn.rollback()
+            return
+        _v2_copy(conn, "id > ?", (last_id,))
+        _v2_copy(conn, "id IN (SELECT id FROM _migration_dirty)")
+        # the search index points at old row ids; init_db rebuilds it
+        conn.execute("DROP TABLE IF EXISTS questions_fts")
+        conn.execute("DROP TABLE questions")
+        conn.execute("ALTER TABLE questions_v2 RENAME TO questions")
+        conn.execute("DROP TABLE _migration_dirty")
+        conn.execute("DROP TABLE _migration_progress")
+        conn.execute("DROP TABLE IF EXISTS _migration_backfill")
+
+        conn.execute("DROP TABLE IF EXISTS question_tags_v2")
+        conn.execute(
+            """
+            CREATE TABLE question_tags_v2 (
+                question_id INTEGER NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (question_id, tag)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(V2_TAGS)
+        conn.execute("DROP TABLE IF EXISTS question_tags")
+        conn.execute("ALTER TABLE question_tags_v2 RENAME TO question_tags")
+
+        # new row counts; the version bump marks columnar mirrors stale
+        conn.execute(
+            """
+            UPDATE keywords SET
+                row_count = (SELECT COUNT(*) FROM keyword_questions k
+                             WHERE k.keyword = keywords.keyword),
+                version = version + 1
+            """
+        )
+        set_version(conn, 2)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    shared = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+    print(f"  migrated {copied} keyword rows into {shared} questions in "
+          f"{time.perf_counter() - start:.1f}s")
+
+
+# ============================================================
+# v3: DISPLAY TITLE + GENERATED CHART COLUMNS
+# ============================================================
+# computed by SQLite on read from the stored row; labels are cut at 80 and
+# 50 characters, like enrichment.prepare_df
+V3_DERIVED_COLUMNS = {
+    "hotness": (
+        "REAL GENERATED ALWAYS AS "
+        "(score + 2 * answer_count + view_count / 100.0) VIRTUAL"
+    ),
+    "title_length": (
+        "INTEGER GENERATED ALWAYS AS (length(display_title)) VIRTUAL"
+    ),
+    "short_title": (
+        "TEXT GENERATED ALWAYS AS (CASE WHEN length(display_title) > 80 "
+        "THEN substr(display_title, 1, 77) || '...' "
+        "ELSE display_title END) VIRTUAL"
+    ),
+    "axis_label": (
+        "TEXT GENERATED ALWAYS AS (CASE WHEN length(display_title) > 50 "
+        "THEN substr(display_title, 1, 50) || '...' "
+        "ELSE display_title END) VIRTUAL"
+    ),
+}
+
+
+def derived_columns_sql() -> str:
+    """Column definitions of V3_DERIVED_COLUMNS for a CREATE TABLE."""
+    return ",\n".join(f"{name} {ddl}"
+                      for name, ddl in V3_DERIVED_COLUMNS.items())
+
+
+def _v3_fill_titles(conn: sqlite3.Connection, after: int,
+                    batch_size: int):
+    """display_title for up to `batch_size` rows past `after`; returns
+    (rows filled, last question_id) or (0, None) when done."""
+    rows = conn.execute(
+        """
+        SELECT question_id, title FROM questions
+        WHERE question_id > ? AND display_title IS NULL
+              AND title IS NOT NULL
+        ORDER BY question_id LIMIT ?
+        """,
+        (after, batch_size),
+    ).fetchall()
+    conn.executemany(
+        "UPDATE questions SET display_title = ? WHERE question_id = ?",
+        [(html.unescape(title), qid) for qid, title in rows],
+    )
+    return len(rows), (rows[-1][0] if rows else None)
+
+
+def _v3_derived_columns(conn: sqlite3.Connection, batch_size: int):
+    # 1. new columns (generated ones cost no storage)
+    _begin(conn)
+    if get_version(conn) >= 3:
+        conn.rollback()
+        return
+    existing = {row[1] for row in
+                conn.execute("PRAGMA table_xinfo(questions)")}
+    if "display_title" not in existing:
+        conn.execute("ALTER TABLE questions ADD COLUMN display_title TEXT")
+    for name, ddl in V3_DERIVED_COLUMNS.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE questions ADD COLUMN {name} {ddl}")
+    # the search index covers the escaped title; init_db rebuilds it over
+    # display_title once the backfill is done
+    drop_search_index(conn)
+    conn.commit()
+
+    # 2. unescape titles in question_id order, one short transaction per
+    # batch; rows stored meanwhile already carry their display_title
+    last_id = -(1 << 63)
+    filled = 0
+    start = last_report = time.perf_counter()
+    while True:
+        _begin(conn)
+        if get_version(conn) >= 3:       # another process finished first
+            conn.rollback()
+            return
+        n, upper = _v3_fill_titles(conn, last_id, batch_size)
+        conn.commit()
+        if upper is None:
+            break
+        filled += n
+        last_id = upper
+        if time.perf_counter() - last_report >= 1:
+            last_report = time.perf_counter()
+            print(f"  unescaping titles: {filled} rows "
+                  f"({last_report - start:.1f}s)")
+
+    _begin(conn)
+    if get_version(conn) < 3:
+        set_version(conn, 3)
+    conn.commit()
+    print(f"  filled {filled} display titles in "
+          f"{time.perf_counter() - start:.1f}s")
+
+
+# ============================================================
+# v4: LINK VERSIONS
+# ============================================================
+def _v4_link_versions(conn: sqlite3.Connection, batch_size: int):
+    # a constant default: SQLite adds the column without touching rows;
+    # existing mirrors go unused until their next write makes a new base
+    _begin(conn)
+    if get_version(conn) >= 4:
+        conn.rollback()
+        return
+    existing = {row[1] for row in
+                conn.execute("PRAGMA table_info(keyword_questions)")}
+    if "version" not in existing:
+        conn.execute("ALTER TABLE keyword_questions "
+                     "ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    set_version(conn, 4)
+    conn.commit()
+
+
+MIGRATIONS = {
+    1: _v1_typed_timestamps,
+    2: _v2_shared_questions,
+    3: _v3_derived_columns,
+    4: _v4_link_versions,
+}
+
+
+def migrate(conn: sqlite3.Connection,
+            batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Apply every pending migration in order; returns the final version."""
+    version = get_version(conn)
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        print(f"Migrating database schema v{target - 1} → v{target}")
+        MIGRATIONS[target](conn, batch_size)
+    return get_version(conn)
+
+
+def main():
+    from stack_db import DB_PATH, get_conn, init_db
+
+    parser = argparse.ArgumentParser(description="Migrate the questions DB.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="rows copied per transaction")
+    parser.add_argument("--status", action="store_true",
+                        help="print the schema version and exit")
+    args = parser.parse_args()
+
+    version = get_version(get_conn(args.db))
+    if args.status:
+        state = "up to date" if version >= SCHEMA_VERSION else "needs migrating"
+        print(f"{args.db}: schema v{version} of v{SCHEMA_VERSION} ({state})")
+        return
+
+    init_db(args.db, batch_size=args.batch_size)
+    print(f"{args.db}: schema v{get_version(get_conn(args.db))}")
+
+
+if __name__ == "__main__":
+    main()
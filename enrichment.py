@@ -0,0 +1,125 @@
+import html
+
+import pandas as pd
+
+from process_pool import map_chunks
+from sentiment_cache import get_polarities
+
+# chart label widths (longer titles are cut and end in "...")
+SHORT_TITLE_CHARS = 80
+AXIS_LABEL_CHARS = 50
+
+
+# ============================================================
+# COLUMN HELPERS
+# ============================================================
+def _unescape(titles: list) -> list:
+    return [html.unescape(t) if isinstance(t, str) and "&" in t else t
+            for t in titles]
+
+
+def unescape_titles(titles: pd.Series, workers: int = None) -> pd.Series:
+    """html.unescape each title; titles without an '&' are passed through."""
+    if titles.empty:
+        return titles.copy()
+    return pd.Series(map_chunks(_unescape, titles.tolist(), workers),
+                     index=titles.index, name=titles.name)
+
+
+def display_titles(df: pd.DataFrame, workers: int = None) -> pd.Series:
+    """
+    Unescaped titles: the stored display_title when every title has one
+    (or only display_title was loaded), else decoded from `title`.
+    """
+    if "display_title" in df.columns:
+        stored = df["display_title"]
+        if ("title" not in df.columns
+                or not (stored.isna() & df["title"].notna()).any()):
+            return stored
+    return unescape_titles(df["title"], workers)
+
+
+def materialized(df: pd.DataFrame, column: str, compute) -> pd.Series:
+    """`column` as computed by the database if every row has it, else compute()."""
+    if column in df.columns and df[column].notna().all():
+        return df[column]
+    return compute()
+
+
+def truncate(titles: pd.Series, lengths: pd.Series, width: int,
+             keep: int) -> pd.Series:
+    """Titles longer than `width` cut to `keep` characters plus '...'."""
+    long = lengths > width
+    if not long.any():
+        return titles.copy()
+    out = titles.copy()
+    out[long] = titles[long].str[:keep] + "..."
+    return out
+
+
+def to_days(dates: pd.Series) -> pd.Series:
+    """Series.dt.date, converting each distinct day only once."""
+    days = dates.dt.floor("D")
+    distinct = days.drop_duplicates()
+    lookup = pd.Series(distinct.dt.date.values, index=distinct.values)
+    return pd.Series(lookup.reindex(days.values).values, index=dates.index,
+                     name=dates.name)
+
+
+# ============================================================
+# DATA PREP
+# ============================================================
+def prepare_df(df: pd.DataFrame, db_path: str = None,
+               workers: int = None) -> pd.DataFrame:
+    """
+    Display columns for the charts: unescaped and shortened titles,
+    sentiment, creation day and Hotness. Rows without a title, author
+    or URL and repeated titles are dropped first, so every derived
+    column is computed once per remaining row. Values the database
+    already derived (display_title, hotness, title_length, short_title,
+    axis_label; see stack_db.DERIVED_COLUMNS) are used when loaded.
+    Unescaping and sentiment for large frames run on `workers` processes
+    (process_pool defaults).
+    """
+    title = display_titles(df, workers)
+    keep = (title.notna() & df["author"].notna() & df["url"].notna()
+            & (df["url"] != ""))
+    keep[keep] = ~title[keep].duplicated(keep="first")
+    df = df[keep]
+    title = title[keep]
+
+    length = materialized(df, "title_length",
+                          lambda: title.str.len()).astype("int64")
+    short = materialized(df, "short_title", lambda: truncate(
+        title, length, SHORT_TITLE_CHARS, SHORT_TITLE_CHARS - 3))
+
+    cols = {
+        "Title": title,
+        "Author": df["author"],
+        "Score": df["score"],
+        "URL": df["url"],
+        "Title Length": length,
+        "Short Title": short,
+        # ✅ FIX: Bokeh-safe alias (NO spaces)
+        "ShortTitle": short,
+        # polarity is cached per unique title in the database
+        "Sentiment": get_polarities(title, db_path, workers),
+    }
+    if "creation_date" in df.columns:
+        created = pd.to_datetime(df["creation_date"], unit="s",
+                                 errors="coerce")
+        cols["Creation Date"] = created
+        cols["Creation Day"] = to_days(created)
+
+    # ⭐ HOTNESS METRIC
+    cols["Hotness"] = materialized(df, "hotness", lambda: (
+        df["score"] * 1
+        + df["answer_count"] * 2
+        + df["view_count"] / 100
+    ))
+
+    # short label for axes
+    cols["ShortShort"] = materialized(df, "axis_label", lambda: truncate(
+        title, length, AXIS_LABEL_CHARS, AXIS_LABEL_CHARS))
+
+    return df.assign(**cols)
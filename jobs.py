@@ -0,0 +1,93 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_scraper import scrape_many
+
+# scrape jobs run here, never on a Flask request thread
+JOB_WORKERS = 2
+
+# finished jobs kept around for status polling
+MAX_FINISHED_JOBS = 200
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS,
+                               thread_name_prefix="scrape-job")
+_jobs = {}
+_lock = threading.Lock()
+
+
+# ============================================================
+# JOB QUEUE
+# ============================================================
+def submit_scrape(keywords, full: bool = False, **scrape_kwargs) -> str:
+    """
+    Queue a background scrape of `keywords` and return its job id.
+    If the same keywords are already queued or running, that job's id is
+    returned instead of starting a duplicate scrape.
+    """
+    keywords = [k for k in dict.fromkeys(keywords) if k]
+    with _lock:
+        for job in _jobs.values():
+            active = job["status"] in ("queued", "running")
+            if active and job["keywords"] == keywords:
+                return job["id"]
+
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {
+            "id": job_id,
+            "keywords": keywords,
+            "full": full,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "rows": 0,
+            "error": None,
+        }
+        _prune()
+
+    _executor.submit(_run, job_id, keywords, full, scrape_kwargs)
+    return job_id
+
+
+def _run(job_id, keywords, full, scrape_kwargs):
+    _update(job_id, status="running", started_at=time.time())
+    try:
+        stats = scrape_many(keywords, full=full, **scrape_kwargs)
+    except Exception as e:
+        print(f"Scrape job {job_id} failed: {e}")
+        _update(job_id, status="failed", error=str(e),
+                finished_at=time.time())
+        return
+
+    # scrape_many reports per-keyword failures instead of raising
+    missing = [k for k in keywords if k not in stats]
+    _update(
+        job_id,
+        status="done",
+        rows=sum(s["rows"] for s in stats.values()),
+        error=f"No data fetched for {', '.join(missing)}" if missing else None,
+        finished_at=time.time(),
+    )
+
+
+def _update(job_id, **fields):
+    with _lock:
+        if job_id in _jobs:
+            _jobs[job_id].update(fields)
+
+
+def _prune():
+    """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS (lock held)."""
+    finished = [j for j in _jobs.values() if j["status"] in ("done", "failed")]
+    finished.sort(key=lambda j: j["finished_at"] or 0)
+    for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[job["id"]]
+
+
+def get_job(job_id: str):
+    """Snapshot of a job's status dict, or None if unknown."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
@@ -1,101 +1,56 @@
-import requests
-import pandas as pd
-import sqlite3
-from datetime import datetime
+import csv
 import os
+import time
 
-DB_PATH = "data/stack_questions.db"
-CSV_PATH = "data/stack_questions.csv"
-
-def init_db():
-    os.makedirs("data", exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            keyword TEXT,
-            scraped_at TEXT,
-            title TEXT,
-            author TEXT,
-            score INTEGER,
-            url TEXT,
-            answer_count INTEGER,
-            is_answered INTEGER,
-            view_count INTEGER,
-            creation_date TEXT,
-            tags TEXT
-        )
-        """
-    )
-    conn.commit()
-    conn.close()
-
-def scrape_keyword(keyword: str):
-    # build API url
-    url = (
-        "https://api.stackexchange.com/2.3/search?"
-        f"order=desc&sort=votes&intitle={keyword}"
-        "&site=stackoverflow&pagesize=100"
-    )
-
-    response = requests.get(url)
-    data = response.json()
+from stack_db import COLUMNS, DB_PATH, get_writer, init_db
+from stack_scraper import DEFAULT_MAX_PAGES, iter_pages, parse_item, store_items
 
-    posts = []
-    scraped_at = datetime.utcnow().isoformat()
-
-    for item in data.get("items", []):
-        title = item.get("title", "No title")
-        author = item.get("owner", {}).get("display_name", "Anonymous")
-        score = item.get("score", 0)
-        link = item.get("link", "")
-        answer_count = item.get("answer_count", 0)
-        is_answered = 1 if item.get("is_answered", False) else 0
-        view_count = item.get("view_count", 0)
-        creation_ts = item.get("creation_date")  # unix timestamp
-        creation_date = (
-            datetime.utcfromtimestamp(creation_ts).isoformat()
-            if creation_ts is not None else None
-        )
-        tags = ",".join(item.get("tags", []))
-
-        posts.append([
-            keyword, scraped_at, title, author, score, link,
-            answer_count, is_answered, view_count, creation_date, tags
-        ])
+CSV_PATH = "data/stack_questions.csv"
 
-    # Updated column names to match the SQLite table schema
-    cols = [
-        "keyword",
-        "scraped_at",
-        "title",
-        "author",
-        "score",
-        "url",
-        "answer_count",
-        "is_answered",
-        "view_count",
-        "creation_date",
-        "tags"
-    ]
-    df = pd.DataFrame(posts, columns=cols)
 
-    # Save to CSV (for backward compatibility)
-    df.to_csv(CSV_PATH, index=False, encoding="utf-8")
-    print(f"Scraped {len(df)} questions → {CSV_PATH}")
+def scrape_keyword(keyword: str, max_pages: int = DEFAULT_MAX_PAGES):
+    scraped_at = int(time.time())
+    total = 0
+    stored = 0
+
+    writer = get_writer(DB_PATH)
+    # Save to CSV (for backward compatibility): each run starts a fresh
+    # file and every page is appended to it as it arrives
+    with open(CSV_PATH, "w", newline="", encoding="utf-8") as f:
+        csv_writer = csv.writer(f)
+        csv_writer.writerow(COLUMNS)
+        for page, items, from_cache in iter_pages(keyword, max_pages):
+            if not items:
+                break
+
+            csv_writer.writerows(
+                parse_item(item, keyword, scraped_at) for item in items
+            )
+            total += len(items)
+
+            # Save to SQLite (cached pages were stored when first fetched)
+            if from_cache:
+                print(f"  page {page}: {len(items)} rows (from cache)")
+                continue
+            n_rows, elapsed = writer.run(store_items, items, keyword,
+                                         scraped_at)
+            stored += n_rows
+            print(
+                f"  page {page}: {n_rows} rows "
+                f"(SQLite insert {elapsed * 1000:.1f} ms)"
+            )
+
+    print(f"Scraped {total} questions → {CSV_PATH}")
+    print(f"Stored {stored} rows in {DB_PATH}")
 
-    # Save to SQLite
-    conn = sqlite3.connect(DB_PATH)
-    df.to_sql("questions", conn, if_exists="append", index=False)
-    conn.close()
-    print(f"Appended {len(df)} rows to {DB_PATH}")
 
 def main():
     keyword = input("Enter a keyword to scrape from StackOverflow: ")
+    pages = input(f"Max pages to fetch [{DEFAULT_MAX_PAGES}]: ").strip()
+    max_pages = int(pages) if pages.isdigit() else DEFAULT_MAX_PAGES
     init_db()
-    scrape_keyword(keyword)
+    os.makedirs(os.path.dirname(CSV_PATH), exist_ok=True)
+    scrape_keyword(keyword, max_pages)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# processes for CPU-bound enrichment (title unescaping, hashing, TextBlob)
+ENRICH_WORKERS = (int(os.environ.get("STACK_ENRICH_WORKERS", "0"))
+                  or os.cpu_count() or 1)
+
+# below this many items the work runs in-process: pickling the chunks and
+# the pool round trip cost more than they save
+PARALLEL_MIN_ITEMS = 50_000
+
+# several chunks per worker so one slow chunk does not leave the rest idle
+CHUNKS_PER_WORKER = 4
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """The process-wide pool with `workers` processes (started on first use)."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # spawn, not fork: the dashboard process already runs threads
+            # (db writer, scrape jobs) that a forked child would inherit
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return pool
+
+
+def map_chunks(fn, items, workers: int = None,
+               min_items: int = PARALLEL_MIN_ITEMS) -> list:
+    """
+    fn(list) -> list over consecutive chunks of `items`, joined in order,
+    so the result is the same as fn(items). Runs serially when `workers`
+    is 1 or there are fewer than `min_items` items. `fn` must be a
+    module-level function (it is pickled by name).
+    """
+    items = list(items)
+    workers = ENRICH_WORKERS if workers is None else workers
+    if workers <= 1 or len(items) < min_items:
+        return fn(items)
+
+    size = -(-len(items) // (workers * CHUNKS_PER_WORKER))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    out = []
+    for part in get_pool(workers).map(fn, chunks):
+        out.extend(part)
+    return out
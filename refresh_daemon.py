@@ -0,0 +1,218 @@
+"""
+Scheduled refresh daemon: keeps tracked keywords fresh in the background so
+dashboard users never wait on a live scrape.
+
+    python refresh_daemon.py                      # keywords from history
+    python refresh_daemon.py --file keywords.txt --max-age 30
+    python refresh_daemon.py --once               # one pass (cron-friendly)
+
+Every keyword is refreshed at least every --max-age minutes; the most viewed
+keywords (see keyword_views) are refreshed POPULAR_SPEEDUP times as often.
+Each pass refreshes the due keywords in parallel through batch_scraper,
+within an hourly API request budget. The incremental scrape only finds new
+questions, so each pass also re-fetches up to --metric-refresh stored
+questions per keyword by id (least recently refreshed first) to keep score,
+answers and views current.
+"""
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from batch_scraper import DEFAULT_CONCURRENCY, read_keywords, scrape_many
+from stack_client import get_client
+from stack_db import (DB_PATH, get_conn, get_keyword_history,
+                      get_keyword_views, get_last_fetched, init_db)
+from stack_scraper import DEFAULT_MAX_PAGES, IDS_PER_REQUEST, refresh_metrics
+
+DEFAULT_MAX_AGE_MINUTES = 60
+DEFAULT_HOURLY_BUDGET = 600     # API requests per rolling hour
+POLL_SECONDS = 30
+# stored questions re-fetched per keyword and pass (one request per 100)
+DEFAULT_METRIC_REFRESH = IDS_PER_REQUEST
+
+# the top POPULAR_SHARE of keywords by views refresh POPULAR_SPEEDUP x faster
+POPULAR_SHARE = 0.25
+POPULAR_SPEEDUP = 3
+
+
+# ============================================================
+# PLANNING
+# ============================================================
+def tracked_keywords(configured=None, history_limit: int = 100,
+                     db_path: str = None) -> list:
+    """Configured keywords first, then everything in the keyword history."""
+    history = get_keyword_history(limit=history_limit, db_path=db_path)
+    return list(dict.fromkeys(list(configured or []) + history))
+
+
+def refresh_intervals(keywords: list, max_age: float, views: dict) -> dict:
+    """{keyword: seconds between refreshes}, shorter for popular keywords."""
+    ranked = sorted(keywords, key=lambda k: views.get(k, 0), reverse=True)
+    n_popular = int(len(ranked) * POPULAR_SHARE)
+    popular = {k for k in ranked[:n_popular] if views.get(k, 0) > 0}
+    return {
+        k: max_age / POPULAR_SPEEDUP if k in popular else max_age
+        for k in keywords
+    }
+
+
+def due_keywords(keywords: list, intervals: dict, db_path: str = None) -> list:
+    """Keywords older than their refresh interval, most overdue first."""
+    now = time.time()
+    conn = get_conn(db_path)
+    overdue = []
+    for k in keywords:
+        last = get_last_fetched(conn, k)
+        if last is None:
+            overdue.append((float("inf"), k))
+            continue
+        age = now - last
+        if age >= intervals[k]:
+            overdue.append((age / intervals[k], k))
+    overdue.sort(reverse=True)
+    return [k for _, k in overdue]
+
+
+# ============================================================
+# DAEMON
+# ============================================================
+class RefreshDaemon:
+    """Refresh loop with a rolling one-hour API request budget."""
+
+    def __init__(self, configured=None,
+                 max_age_minutes: float = DEFAULT_MAX_AGE_MINUTES,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 max_pages: int = DEFAULT_MAX_PAGES,
+                 hourly_budget: int = DEFAULT_HOURLY_BUDGET,
+                 history_limit: int = 100, db_path: str = None,
+                 metric_refresh: int = DEFAULT_METRIC_REFRESH):
+        self.configured = configured or []
+        self.max_age = max_age_minutes * 60
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.metric_refresh = metric_refresh
+        self.hourly_budget = hourly_budget
+        self.history_limit = history_limit
+        self.db_path = db_path or DB_PATH
+        self.spent = deque()    # (timestamp, requests) per pass
+
+    def budget_left(self) -> int:
+        cutoff = time.time() - 3600
+        while self.spent and self.spent[0][0] < cutoff:
+            self.spent.popleft()
+        return self.hourly_budget - sum(n for _, n in self.spent)
+
+    def requests_per_keyword(self) -> int:
+        """Most requests one keyword can cost in a pass."""
+        return self.max_pages + -(-self.metric_refresh // IDS_PER_REQUEST)
+
+    def refresh_keyword_metrics(self, keyword: str, older_than: int) -> int:
+        try:
+            return refresh_metrics(keyword, self.metric_refresh, self.db_path,
+                                   older_than)
+        except Exception as e:
+            print(f"Metric refresh failed for '{keyword}': {e}")
+            return 0
+
+    def run_once(self) -> dict:
+        """Refresh whatever is due right now; returns scrape_many stats."""
+        keywords = tracked_keywords(self.configured, self.history_limit,
+                                    self.db_path)
+        if not keywords:
+            return {}
+
+        intervals = refresh_intervals(keywords, self.max_age,
+                                      get_keyword_views(self.db_path))
+        due = due_keywords(keywords, intervals, self.db_path)
+
+        # every keyword may cost up to max_pages + metric refresh requests
+        affordable = (max(0, self.budget_left())
+                      // max(1, self.requests_per_keyword()))
+        batch = due[:affordable]
+        if len(batch) < len(due):
+            print(f"API budget: deferring {len(due) - len(batch)} keywords")
+        if not batch:
+            return {}
+
+        before = get_client().stats()["requests"]
+        started_at = int(time.time())
+        start = time.perf_counter()
+        stats = scrape_many(batch, self.concurrency, self.max_pages,
+                            self.db_path)
+        refreshed = 0
+        if self.metric_refresh > 0:
+            # questions the scrape just stored are fresh already
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                refreshed = sum(pool.map(self.refresh_keyword_metrics, batch,
+                                         [started_at] * len(batch)))
+        used = get_client().stats()["requests"] - before
+        self.spent.append((time.time(), used))
+
+        rows = sum(s["rows"] for s in stats.values())
+        print(
+            f"[{datetime.now():%H:%M:%S}] refreshed {len(stats)}/{len(batch)} "
+            f"keywords, {rows} new rows, {refreshed} metric updates, "
+            f"{used} requests in {time.perf_counter() - start:.1f}s"
+        )
+        return stats
+
+    def run_forever(self, poll_seconds: float = POLL_SECONDS):
+        print(
+            f"Refresh daemon started (max age {self.max_age / 60:.0f} min, "
+            f"budget {self.hourly_budget} requests/hour)"
+        )
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Refresh pass failed: {e}")
+            time.sleep(poll_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep tracked StackOverflow keywords fresh."
+    )
+    parser.add_argument("keywords", nargs="*", help="extra keywords to track")
+    parser.add_argument("--file", "-f", help="file with one keyword per line")
+    parser.add_argument("--max-age", type=float,
+                        default=DEFAULT_MAX_AGE_MINUTES,
+                        help="maximum data age in minutes")
+    parser.add_argument("--concurrency", "-c", type=int,
+                        default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--max-pages", "-p", type=int,
+                        default=DEFAULT_MAX_PAGES)
+    parser.add_argument("--hourly-budget", type=int,
+                        default=DEFAULT_HOURLY_BUDGET,
+                        help="API requests allowed per rolling hour")
+    parser.add_argument("--history-limit", type=int, default=100,
+                        help="how many history keywords to track")
+    parser.add_argument("--metric-refresh", type=int,
+                        default=DEFAULT_METRIC_REFRESH,
+                        help="stored questions per keyword re-fetched each "
+                             "pass for fresh score/answers/views (0 = off)")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS,
+                        help="seconds between passes")
+    parser.add_argument("--once", action="store_true",
+                        help="run a single pass and exit")
+    args = parser.parse_args()
+
+    configured = list(args.keywords)
+    if args.file:
+        configured += read_keywords(args.file)
+
+    init_db()
+    daemon = RefreshDaemon(configured, args.max_age, args.concurrency,
+                           args.max_pages, args.hourly_budget,
+                           args.history_limit,
+                           metric_refresh=args.metric_refresh)
+    if args.once:
+        daemon.run_once()
+    else:
+        daemon.run_forever(args.poll)
+
+
+if __name__ == "__main__":
+    main()
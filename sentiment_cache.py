@@ -0,0 +1,88 @@
+import hashlib
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from textblob import TextBlob
+
+from process_pool import map_chunks
+from stack_db import get_conn, get_writer
+
+# TextBlob is slow enough per title that a pool pays off much sooner
+PARALLEL_MIN_SCORES = 2_000
+
+
+def title_key(title: str) -> int:
+    """64-bit content hash of a title, used as the cache key."""
+    digest = hashlib.blake2b(title.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def polarity(title: str) -> float:
+    return TextBlob(title).sentiment.polarity
+
+
+# list → list versions for process_pool.map_chunks
+def title_keys(titles: list) -> list:
+    return [title_key(t) for t in titles]
+
+
+def polarities(titles: list) -> list:
+    return [polarity(t) for t in titles]
+
+
+# ============================================================
+# BULK LOOKUP
+# ============================================================
+def _lookup(keys, db_path: str = None) -> dict:
+    """{title_hash: polarity} for the keys already in the cache."""
+    try:
+        return dict(get_conn(db_path).execute(
+            """
+            SELECT title_hash, polarity FROM title_sentiment
+            WHERE title_hash IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(list(keys)),),
+        ))
+    except sqlite3.OperationalError:
+        # table not created yet: everything is a miss
+        return {}
+
+
+def _store(conn: sqlite3.Connection, scores):
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO title_sentiment (title_hash, polarity) "
+            "VALUES (?, ?)",
+            scores,
+        )
+
+
+def get_polarities(titles, db_path: str = None,
+                   workers: int = None) -> pd.Series:
+    """
+    TextBlob polarity for every title, aligned with `titles`.
+    Each distinct title is scored once and kept in title_sentiment;
+    only titles not seen before are run through TextBlob. Hashing and
+    scoring large batches is spread over `workers` processes.
+    """
+    titles = pd.Series(titles)
+    codes, distinct = pd.factorize(titles)
+    distinct = distinct.tolist()
+    keys = map_chunks(title_keys, distinct, workers)
+    scores = _lookup(keys, db_path)
+
+    new = [(k, t) for t, k in zip(distinct, keys) if k not in scores]
+    if new:
+        missing = list(zip(
+            [k for k, _ in new],
+            map_chunks(polarities, [t for _, t in new], workers,
+                       PARALLEL_MIN_SCORES),
+        ))
+        get_writer(db_path).run(_store, missing)
+        scores.update(missing)
+
+    # one score per distinct title, then NaN for missing titles (code -1)
+    values = np.array([scores[k] for k in keys] + [np.nan])
+    return pd.Series(values[codes], index=titles.index, name=titles.name)
@@ -0,0 +1,184 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api_cache import ResponseCache
+from api_scheduler import RETRY_MAX_DELAY, RETRYABLE_ERROR_IDS, RequestScheduler
+
+# (connect, read) seconds — a stalled API call must not hang a Flask worker
+DEFAULT_TIMEOUT = (5, 30)
+
+# pooled keep-alive connections; batch_scraper grows the pool to its
+# concurrency (ensure_pool_size)
+DEFAULT_POOL_SIZE = 16
+
+USER_AGENT = "StackOverflowScraper/1.0"
+
+
+class StackApiError(Exception):
+    """The API kept answering with an error payload (or a 5xx) after retries."""
+
+    def __init__(self, error_id, error_name, message):
+        super().__init__(f"{error_name} ({error_id}): {message}")
+        self.error_id = error_id
+        self.error_name = error_name
+
+
+# ============================================================
+# SHARED HTTP CLIENT
+# ============================================================
+class StackClient:
+    """
+    Thin wrapper around one requests.Session used for every StackExchange
+    call: keep-alive connection pooling, gzip/deflate transfer, default
+    timeouts, and request/byte counters.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT, cache: ResponseCache = None,
+                 scheduler: RequestScheduler = None):
+        self.timeout = timeout
+        self.cache = cache
+        self.scheduler = scheduler or RequestScheduler()
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": USER_AGENT,
+        })
+        self.pool_size = 0
+        self._mount(pool_size)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0   # on the wire (compressed when gzip is used)
+        self.bytes_decoded = 0    # after decompression
+
+    def _mount(self, pool_size: int):
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_size = pool_size
+
+    def ensure_pool_size(self, pool_size: int):
+        """
+        Keep at least `pool_size` connections per host, so that many
+        concurrent requests reuse keep-alive connections instead of
+        opening and discarding extra ones.
+        """
+        with self._lock:
+            if pool_size > self.pool_size:
+                self._mount(pool_size)
+
+    def get_json(self, url: str, params: dict = None,
+                 use_cache: bool = True) -> dict:
+        """
+        GET `url` and return the decoded JSON body.
+        Fresh cached responses are returned without a request and carry
+        `"_from_cache": True`.
+
+        Every request goes through the RequestScheduler (rate limit and
+        API `backoff`). Network errors, 5xx and retryable API errors are
+        retried with jittered backoff; anything else, or running out of
+        retries, raises StackApiError.
+        """
+        if use_cache and self.cache is not None:
+            data = self.cache.get(url, params)
+            if data is not None:
+                data["_from_cache"] = True
+                return data
+
+        method = urlsplit(url).path
+        attempt = 0
+        while True:
+            self.scheduler.wait_turn(method)
+            data, retryable = self._request(url, params)
+            if data is not None:
+                self.scheduler.record(method, data)
+                if "error_id" not in data:
+                    break
+                retryable = data["error_id"] in RETRYABLE_ERROR_IDS
+
+            if not retryable or attempt >= self.scheduler.max_retries:
+                raise _api_error(data)
+            delay = self.scheduler.retry_delay(attempt, data)
+            if delay > RETRY_MAX_DELAY:
+                raise _api_error(data)
+            time.sleep(delay)
+            attempt += 1
+
+        # only successful payloads get this far, so errors are never cached
+        if self.cache is not None:
+            self.cache.put(url, params, data)
+        return data
+
+    def _request(self, url: str, params: dict):
+        """
+        One GET. Returns (json_or_None, retryable): network errors and
+        non-JSON 5xx responses give (None, True).
+        """
+        try:
+            response = self.session.get(url, params=params,
+                                        timeout=self.timeout)
+        except requests.RequestException as e:
+            with self._lock:
+                self.requests += 1
+                self.errors += 1
+            print(f"Request error for {url}: {e}")
+            return None, True
+
+        body = response.content
+        wire = int(response.headers.get("Content-Length") or len(body))
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += wire
+            self.bytes_decoded += len(body)
+            if response.status_code >= 400:
+                self.errors += 1
+
+        try:
+            return response.json(), False
+        except ValueError:
+            return None, response.status_code >= 500
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "bytes_received": self.bytes_received,
+                "bytes_decoded": self.bytes_decoded,
+            }
+        stats["scheduler"] = self.scheduler.stats()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def close(self):
+        self.session.close()
+
+
+def _api_error(data) -> StackApiError:
+    if data is None:
+        return StackApiError(None, "request_failed",
+                             "no usable response after retries")
+    return StackApiError(data.get("error_id"), data.get("error_name"),
+                         data.get("error_message", ""))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> StackClient:
+    """Return the process-wide StackClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = StackClient(cache=ResponseCache())
+    return _client
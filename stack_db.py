@@ -0,0 +1,1141 @@
+import html
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+import columnar_store
+from db_migrations import (DEFAULT_BATCH_SIZE, SCHEMA_VERSION,
+                           V3_DERIVED_COLUMNS, derived_columns_sql,
+                           drop_search_index, get_version, migrate,
+                           set_version)
+
+DB_PATH = "data/stack_questions.db"
+
+# column order used for every insert into `questions`
+COLUMNS = [
+    "keyword",
+    "scraped_at",
+    "title",
+    "author",
+    "score",
+    "url",
+    "answer_count",
+    "is_answered",
+    "view_count",
+    "creation_date",
+    "tags",
+    "question_id",
+]
+
+# per-keyword columns (keyword_questions); the rest live in `questions`
+LINK_COLUMNS = ["keyword", "scraped_at"]
+QUESTION_COLUMNS = ["question_id"] + [
+    c for c in COLUMNS if c not in LINK_COLUMNS + ["question_id"]
+] + ["updated_at", "display_title"]
+
+# chart values SQLite computes from the stored row (generated columns)
+DERIVED_COLUMNS = list(V3_DERIVED_COLUMNS)
+
+# a question is stored once, whichever keywords found it; re-scrapes
+# refresh its metrics
+INSERT_SQL = (
+    f"INSERT INTO questions ({', '.join(QUESTION_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in QUESTION_COLUMNS)}) "
+    "ON CONFLICT(question_id) DO UPDATE SET "
+    + ", ".join(
+        f"{c} = excluded.{c}" for c in QUESTION_COLUMNS[1:]
+    )
+)
+
+LINK_SQL = (
+    "INSERT INTO keyword_questions (keyword, question_id, scraped_at) "
+    "VALUES (?, ?, ?) "
+    "ON CONFLICT(keyword, question_id) DO UPDATE SET "
+    "scraped_at = excluded.scraped_at"
+)
+
+# most rows a full-text search returns (search_questions)
+SEARCH_LIMIT = 1_000
+
+# what get_top_questions can rank by (both indexed)
+TOP_ORDERS = ["hotness", "title_length"]
+TOP_COLUMNS = ["question_id", "display_title", "short_title", "axis_label",
+               "url", "hotness", "title_length"]
+
+# connection tuning (see get_conn)
+BUSY_TIMEOUT_SECONDS = 30
+CACHE_SIZE_KIB = 20_000
+# idle connections kept per database file for short-lived threads
+# (release_conns), e.g. one per request in the threaded Flask server
+POOL_SIZE = 8
+
+
+# ============================================================
+# CONNECTIONS
+# ============================================================
+_local = threading.local()
+_idle = {}          # db_path -> connections released by finished threads
+_idle_lock = threading.Lock()
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    # a connection is only ever used by the thread holding it, but a
+    # released one is handed on to another thread (release_conns)
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS,
+                           check_same_thread=False)
+    # only takes effect on a new file (or at the next VACUUM), and must come
+    # before WAL; lets db_maintenance.py give free pages back in small steps
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # WAL: readers never block the writer and never wait for it;
+    # NORMAL sync is durable across app crashes (fsync at checkpoints)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def get_conn(db_path: str = None) -> sqlite3.Connection:
+    """
+    This thread's connection to `db_path`: taken from the idle pool or
+    opened on first use, and reused afterwards. Callers must not close it.
+    Use it for reads; writes go through get_writer(db_path) so there is
+    only one writer per file.
+    """
+    db_path = os.path.abspath(db_path or DB_PATH)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        with _idle_lock:
+            idle = _idle.get(db_path)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = _connect(db_path)
+        conns[db_path] = conn
+    return conn
+
+
+def release_conns():
+    """
+    Give this thread's connections back to the idle pool (at most
+    POOL_SIZE per file, the rest are closed). For threads that end after
+    one unit of work, such as Flask's per-request threads; the next
+    get_conn on any thread reuses them instead of opening a new one.
+    """
+    conns = getattr(_local, "conns", None)
+    if not conns:
+        return
+    _local.conns = {}
+    for db_path, conn in conns.items():
+        if conn.in_transaction:
+            conn.rollback()
+        with _idle_lock:
+            idle = _idle.setdefault(db_path, [])
+            if len(idle) < POOL_SIZE:
+                idle.append(conn)
+                continue
+        conn.close()
+
+
+class DbWriter:
+    """
+    One thread that performs every write to one database file, in order.
+    `fn(conn, *args)` runs on that thread with its own connection, so
+    concurrent scrapes, jobs and page views never contend for the lock.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True,
+                                        name="db-writer")
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Queue `fn(conn, *args, **kwargs)`; returns a Future of its result."""
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """submit() and wait for the result (re-raises fn's exception)."""
+        if threading.current_thread() is self._thread:
+            return fn(get_conn(self.db_path), *args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _loop(self):
+        while True:
+            future, fn, args, kwargs = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            conn = None
+            try:
+                conn = get_conn(self.db_path)
+                result = fn(conn, *args, **kwargs)
+            except BaseException as e:
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+def get_writer(db_path: str = None) -> DbWriter:
+    """The process-wide DbWriter for `db_path` (started on first use)."""
+    db_path = os.path.abspath(db_path or DB_PATH)
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = _writers[db_path] = DbWriter(db_path)
+        return writer
+
+
+# ============================================================
+# SCHEMA
+# ============================================================
+def init_db(db_path: str = None, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Create the schema, or bring an existing database up to date (see
+    db_migrations; large tables are migrated `batch_size` rows at a time).
+    """
+    db_path = db_path or DB_PATH
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    get_writer(db_path).run(_create_schema, batch_size)
+
+
+def _create_schema(conn: sqlite3.Connection,
+                   batch_size: int = DEFAULT_BATCH_SIZE):
+    existing = conn.execute(
+        "SELECT 1 FROM sqlite_master "
+        "WHERE type = 'table' AND name = 'questions'"
+    ).fetchone() is not None
+    version = get_version(conn)
+
+    cur = conn.cursor()
+    # timestamps are INTEGER unix seconds (UTC) throughout.
+    # one row per question, shared by every keyword that found it;
+    # updated_at is when its metrics were last refreshed, display_title
+    # the HTML-unescaped title (set at ingest). The chart values derived
+    # from them are virtual generated columns, computed on read.
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS questions (
+            question_id INTEGER PRIMARY KEY,
+            title TEXT,
+            author TEXT,
+            score INTEGER,
+            url TEXT,
+            answer_count INTEGER,
+            is_answered INTEGER NOT NULL DEFAULT 0,
+            view_count INTEGER,
+            creation_date INTEGER,
+            tags TEXT,
+            updated_at INTEGER,
+            display_title TEXT,
+            {derived_columns_sql()}
+        )
+        """
+    )
+    # which keywords found which questions, and when each last did;
+    # `version` is the keyword's version when the row last changed
+    # (appends to the columnar mirror)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS keyword_questions (
+            keyword TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            scraped_at INTEGER,
+            version INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (keyword, question_id)
+        ) WITHOUT ROWID
+        """
+    )
+    # one row per keyword, maintained at ingest (history dropdown);
+    # `version` changes on every ingest (columnar mirror freshness)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS keywords (
+            keyword TEXT PRIMARY KEY,
+            last_seen INTEGER,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    # one row per (question, tag); the PK serves per-question lookups,
+    # idx_question_tags_tag tag filters and the leaderboard
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS question_tags (
+            question_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (question_id, tag)
+        ) WITHOUT ROWID
+        """
+    )
+    # compact metric time series: a snapshot only when something changed
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS question_metrics (
+            question_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            score INTEGER,
+            answer_count INTEGER,
+            view_count INTEGER,
+            PRIMARY KEY (question_id, ts)
+        ) WITHOUT ROWID
+        """
+    )
+    # how often each keyword is opened in the dashboard (refresh priority)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS keyword_views (
+            keyword TEXT PRIMARY KEY,
+            views INTEGER NOT NULL DEFAULT 0,
+            last_viewed_at INTEGER
+        )
+        """
+    )
+    # per-keyword high-water mark for incremental scrapes
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scrape_state (
+            keyword TEXT PRIMARY KEY,
+            max_creation_date INTEGER,
+            last_fetched_at INTEGER
+        )
+        """
+    )
+    # TextBlob polarity per unique title text (see sentiment_cache.py)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS title_sentiment (
+            title_hash INTEGER PRIMARY KEY,
+            polarity REAL NOT NULL
+        )
+        """
+    )
+
+    if existing and version < SCHEMA_VERSION:
+        migrate(conn, batch_size)
+    elif not existing:
+        set_version(conn, SCHEMA_VERSION)
+
+    # keywords sharing a question (overlap, leaderboard, orphan cleanup)
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_keyword_questions_question
+        ON keyword_questions (question_id)
+        """
+    )
+    # rows changed since a keyword's last columnar mirror write
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_keyword_questions_version
+        ON keyword_questions (keyword, version)
+        """
+    )
+    # creation date ranges across keywords
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_questions_creation_date
+        ON questions (creation_date)
+        """
+    )
+    # top-N charts read questions in these orders (get_top_questions)
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_questions_hotness
+        ON questions (hotness)
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_questions_title_length
+        ON questions (title_length)
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_keywords_last_seen
+        ON keywords (last_seen)
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_question_tags_tag
+        ON question_tags (tag, question_id)
+        """
+    )
+    # snapshot ranges ("everything that changed this week")
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_question_metrics_ts
+        ON question_metrics (ts)
+        """
+    )
+    _create_search_index(conn)
+    conn.commit()
+
+
+def _create_search_index(conn: sqlite3.Connection):
+    """
+    FTS5 index over unescaped question titles (display_title) and tags
+    (search_questions). It stores no text of its own (content=questions)
+    and triggers keep it in step with every insert, upsert and delete.
+    Built from existing rows the first time; skipped with a message if
+    SQLite lacks FTS5.
+    """
+    existing = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'questions_fts'"
+    ).fetchone() is not None
+    if existing and "display_title" not in {
+            row[1] for row in conn.execute("PRAGMA table_info(questions_fts)")}:
+        # an index over the escaped title (before v3): start over
+        drop_search_index(conn)
+        existing = False
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+                display_title, tags,
+                content = 'questions', content_rowid = 'question_id',
+                tokenize = 'porter unicode61 remove_diacritics 2'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Full-text search unavailable ({e}); using LIKE")
+        return
+
+    conn.executescript(
+        """
+        CREATE TRIGGER IF NOT EXISTS questions_fts_insert
+        AFTER INSERT ON questions BEGIN
+            INSERT INTO questions_fts (rowid, display_title, tags)
+            VALUES (new.question_id, new.display_title, new.tags);
+        END;
+        CREATE TRIGGER IF NOT EXISTS questions_fts_delete
+        AFTER DELETE ON questions BEGIN
+            INSERT INTO questions_fts
+                (questions_fts, rowid, display_title, tags)
+            VALUES ('delete', old.question_id, old.display_title, old.tags);
+        END;
+        -- re-scrapes rewrite every column; only re-index changed text
+        CREATE TRIGGER IF NOT EXISTS questions_fts_update
+        AFTER UPDATE OF display_title, tags ON questions
+        WHEN old.display_title IS NOT new.display_title
+             OR old.tags IS NOT new.tags BEGIN
+            INSERT INTO questions_fts
+                (questions_fts, rowid, display_title, tags)
+            VALUES ('delete', old.question_id, old.display_title, old.tags);
+            INSERT INTO questions_fts (rowid, display_title, tags)
+            VALUES (new.question_id, new.display_title, new.tags);
+        END;
+        """
+    )
+    if not existing:
+        conn.execute("INSERT INTO questions_fts (questions_fts) "
+                     "VALUES ('rebuild')")
+
+
+def reset_db(db_path: str = None):
+    """
+    Drop every table and recreate an empty schema (full reset). The file
+    itself stays: other threads and processes may hold open connections.
+    """
+    db_path = db_path or DB_PATH
+    if not os.path.exists(db_path):
+        return
+    get_writer(db_path).run(_drop_all)
+    columnar_store.clear(db_path)
+    init_db(db_path)
+    print("Database reset.")
+
+
+def _drop_all(conn: sqlite3.Connection):
+    # virtual tables first: dropping one drops its shadow tables
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master "
+        "WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY sql LIKE 'CREATE VIRTUAL%' DESC"
+    )]
+    with conn:
+        for table in tables:
+            conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+    conn.execute("VACUUM")
+
+
+# ============================================================
+# READS
+# ============================================================
+def load_data(keyword: str, db_path: str = None, tag: str = None,
+              columns=None) -> pd.DataFrame:
+    """
+    All stored questions for `keyword`, optionally only those tagged `tag`
+    and only `columns`. Untagged loads come from the columnar mirror when
+    it is up to date (see columnar_store), otherwise from SQLite.
+    """
+    conn = get_conn(db_path)
+    if not tag:
+        df = columnar_store.read_partition(conn, db_path or DB_PATH, keyword,
+                                           columns)
+        if df is not None:
+            return df
+
+    if tag:
+        query = f"""
+            SELECT {_select_list(columns)}
+            FROM question_tags t
+            JOIN keyword_questions kq ON kq.question_id = t.question_id
+            JOIN questions q ON q.question_id = t.question_id
+            WHERE t.tag = ? AND kq.keyword = ?
+        """
+        params = [tag, keyword]
+    else:
+        query = f"""
+            SELECT {_select_list(columns)}
+            FROM keyword_questions kq
+            JOIN questions q ON q.question_id = kq.question_id
+            WHERE kq.keyword = ?
+        """
+        params = [keyword]
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def _select_list(columns=None) -> str:
+    """SELECT list over `kq` (keyword_questions) JOIN `q` (questions)."""
+    if not columns:
+        return "kq.keyword, kq.scraped_at, q.*"
+    return ", ".join(
+        f"kq.{c}" if c in LINK_COLUMNS else f"q.{c}" for c in columns
+    )
+
+
+def refresh_mirror(keyword: str, db_path: str = None,
+                   compact: bool = False) -> bool:
+    """
+    Append `keyword`'s changed rows to its columnar mirror, or rewrite it
+    whole with `compact` (no-op without pyarrow).
+    """
+    db_path = db_path or DB_PATH
+    try:
+        return columnar_store.write_partition(get_conn(db_path), db_path,
+                                              keyword, compact)
+    except Exception as e:
+        # the mirror is an optimisation; SQLite stays the source of truth
+        print(f"Columnar mirror update failed for '{keyword}': {e}")
+        return False
+
+
+def get_tag_counts(keyword: str, limit: int = 10, tag: str = None,
+                   db_path: str = None) -> pd.DataFrame:
+    """
+    Most common tags among `keyword`'s questions as a [Tag, Count] frame.
+    With `tag`, only questions carrying that tag are counted (co-tags).
+    """
+    conn = get_conn(db_path)
+    if tag:
+        query = """
+            SELECT t.tag AS Tag, COUNT(*) AS Count
+            FROM question_tags f
+            JOIN keyword_questions kq ON kq.question_id = f.question_id
+            JOIN question_tags t ON t.question_id = f.question_id
+            WHERE f.tag = ? AND kq.keyword = ?
+            GROUP BY t.tag
+            ORDER BY Count DESC, Tag
+            LIMIT ?
+        """
+        params = [tag, keyword, limit]
+    else:
+        query = """
+            SELECT t.tag AS Tag, COUNT(*) AS Count
+            FROM keyword_questions kq
+            JOIN question_tags t ON t.question_id = kq.question_id
+            WHERE kq.keyword = ?
+            GROUP BY t.tag
+            ORDER BY Count DESC, Tag
+            LIMIT ?
+        """
+        params = [keyword, limit]
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def _chart_rows_sql(keyword: str, tag: str = None):
+    """
+    FROM/WHERE over `keyword`'s questions (`q`) that the dashboard charts,
+    i.e. with a title, author and URL; only those tagged `tag` if given.
+    """
+    sql = """
+        FROM keyword_questions kq
+        JOIN questions q ON q.question_id = kq.question_id
+    """
+    params = []
+    if tag:
+        sql += """
+        JOIN question_tags f
+             ON f.question_id = kq.question_id AND f.tag = ?
+        """
+        params.append(tag)
+    sql += """
+        WHERE kq.keyword = ?
+          AND q.display_title IS NOT NULL AND q.author IS NOT NULL
+          AND coalesce(q.url, '') != ''
+    """
+    params.append(keyword)
+    return sql, params
+
+
+def _walk_index(conn: sqlite3.Connection, keyword: str, limit: int) -> bool:
+    """
+    Whether `keyword`'s top `limit` is cheaper to find by walking a
+    questions index best-first than by sorting all of its questions.
+    The walk reads about limit * total / k index entries before it has
+    found `limit` of the keyword's k questions; the sort reads k rows.
+    Without this choice SQLite sorts big keywords until ANALYZE has run,
+    and with stats it walks the index even for tiny ones.
+    """
+    k, total = conn.execute(
+        """
+        SELECT (SELECT row_count FROM keywords WHERE keyword = ?),
+               (SELECT SUM(row_count) FROM keywords)
+        """,
+        (keyword,),
+    ).fetchone()
+    return bool(k) and k * k > limit * total
+
+
+def get_top_questions(keyword: str, by: str = "hotness", limit: int = 5,
+                      tag: str = None, db_path: str = None) -> pd.DataFrame:
+    """
+    `keyword`'s `limit` questions with the highest `by` (a TOP_ORDERS
+    column), best first, as TOP_COLUMNS. Rows are read in index order and
+    the query stops after `limit`, so the keyword is never loaded whole.
+    A title repeated under several question ids is shown once.
+    """
+    if by not in TOP_ORDERS:
+        raise ValueError(f"cannot rank questions by {by!r}")
+    conn = get_conn(db_path)
+    where, params = _chart_rows_sql(keyword, tag)
+    order = f"q.{by}"
+    if not tag:
+        if _walk_index(conn, keyword, limit):
+            where = where.replace("JOIN questions q",
+                                  f"JOIN questions q INDEXED BY "
+                                  f"idx_questions_{by}")
+        else:
+            order = f"+q.{by}"     # unary + keeps the planner off the index
+    cursor = conn.execute(
+        f"""
+        SELECT {", ".join(f"q.{c}" for c in TOP_COLUMNS)}
+        {where}
+        ORDER BY {order} DESC, q.question_id DESC
+        """,
+        params,
+    )
+    title = TOP_COLUMNS.index("display_title")
+    rows, seen = [], set()
+    for row in cursor:
+        if row[title] in seen:
+            continue
+        seen.add(row[title])
+        rows.append(row)
+        if len(rows) >= limit:
+            break
+    cursor.close()
+    return pd.DataFrame(rows, columns=TOP_COLUMNS)
+
+
+def get_author_counts(keyword: str, limit: int = 5, tag: str = None,
+                      db_path: str = None) -> pd.DataFrame:
+    """
+    Authors with the most of `keyword`'s questions as an [Author, Count]
+    frame (see get_tag_counts); only questions tagged `tag` if given.
+    """
+    where, params = _chart_rows_sql(keyword, tag)
+    return pd.read_sql_query(
+        f"""
+        SELECT q.author AS Author, COUNT(*) AS Count
+        {where}
+        GROUP BY q.author
+        ORDER BY Count DESC, Author
+        LIMIT ?
+        """,
+        get_conn(db_path),
+        params=params + [limit],
+    )
+
+
+def get_keyword_overlap(keyword: str, other: str,
+                        db_path: str = None) -> dict:
+    """
+    How many stored questions `keyword` and `other` share, answered from
+    keyword_questions alone (an indexed join, no question rows loaded):
+    {"shared", "left", "right", "jaccard"} with left/right the questions
+    only one of them has.
+    """
+    a, b, shared = get_conn(db_path).execute(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM keyword_questions WHERE keyword = :a),
+            (SELECT COUNT(*) FROM keyword_questions WHERE keyword = :b),
+            (SELECT COUNT(*) FROM keyword_questions x
+             JOIN keyword_questions y
+               ON y.keyword = :b AND y.question_id = x.question_id
+             WHERE x.keyword = :a)
+        """,
+        {"a": keyword, "b": other},
+    ).fetchone()
+    union = a + b - shared
+    return {
+        "shared": shared,
+        "left": a - shared,
+        "right": b - shared,
+        "jaccard": shared / union if union else 0.0,
+    }
+
+
+def get_shared_questions(keyword: str, other: str, limit: int = 10,
+                         db_path: str = None) -> pd.DataFrame:
+    """
+    The highest-scoring questions stored under both keywords, with their
+    unescaped title as `title`.
+    """
+    query = """
+        SELECT q.display_title AS title, q.url, q.score
+        FROM keyword_questions x
+        JOIN keyword_questions y
+          ON y.keyword = ? AND y.question_id = x.question_id
+        JOIN questions q ON q.question_id = x.question_id
+        WHERE x.keyword = ?
+        ORDER BY q.score DESC
+        LIMIT ?
+    """
+    return pd.read_sql_query(query, get_conn(db_path),
+                             params=[other, keyword, limit])
+
+
+def fts_query(text: str) -> str:
+    """
+    Free text → FTS5 query: every word must match (as a quoted term, so
+    user input can never be a syntax error). Empty for blank input.
+    """
+    return " ".join(
+        '"{}"'.format(word.replace('"', '""')) for word in text.split()
+    )
+
+
+def _search_sql(conn: sqlite3.Connection, query: str, keyword: str = None):
+    """(FROM/WHERE clause, params) matching `query`; FTS5 or LIKE fallback."""
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'questions_fts'"
+    ).fetchone() is not None
+    if has_fts:
+        where = """
+            FROM questions_fts f JOIN questions q ON q.question_id = f.rowid
+            WHERE questions_fts MATCH ?
+        """
+        params = [fts_query(query)]
+    else:
+        words = query.split()
+        where = "FROM questions q WHERE " + " AND ".join(
+            "(q.display_title LIKE ? OR q.tags LIKE ?)" for _ in words
+        )
+        params = [p for w in words for p in (f"%{w}%", f"%{w}%")]
+    if keyword:
+        where += """
+            AND EXISTS (SELECT 1 FROM keyword_questions kq
+                        WHERE kq.keyword = ? AND kq.question_id = q.question_id)
+        """
+        params.append(keyword)
+    return where, params, has_fts
+
+
+def search_questions(query: str, db_path: str = None, keyword: str = None,
+                     limit: int = SEARCH_LIMIT, columns=None) -> pd.DataFrame:
+    """
+    Stored questions whose title or tags contain every word of `query`
+    (stemmed, so "index" also finds "indexing"), best match first, across
+    all keywords or only `keyword`. Only `columns` of `questions`, if given.
+    """
+    columns = list(columns or QUESTION_COLUMNS)
+    if not query or not query.split():
+        return pd.DataFrame(columns=columns)
+    conn = get_conn(db_path)
+    where, params, has_fts = _search_sql(conn, query, keyword)
+    # bm25: lower is better
+    order = "f.rank" if has_fts else "q.score DESC"
+    sql = f"""
+        SELECT {", ".join(f"q.{c}" for c in columns)} {where}
+        ORDER BY {order}
+        LIMIT ?
+    """
+    return pd.read_sql_query(sql, conn, params=params + [limit])
+
+
+def get_search_tag_counts(query: str, limit: int = 10, keyword: str = None,
+                          db_path: str = None) -> pd.DataFrame:
+    """[Tag, Count] of the questions matching `query` (see get_tag_counts)."""
+    if not query or not query.split():
+        return pd.DataFrame(columns=["Tag", "Count"])
+    conn = get_conn(db_path)
+    where, params, _ = _search_sql(conn, query, keyword)
+    sql = f"""
+        SELECT t.tag AS Tag, COUNT(*) AS Count
+        FROM question_tags t
+        JOIN (SELECT q.question_id {where}) m
+          ON t.question_id = m.question_id
+        GROUP BY t.tag
+        ORDER BY Count DESC, Tag
+        LIMIT ?
+    """
+    return pd.read_sql_query(sql, conn, params=params + [limit])
+
+
+def get_tag_leaderboard(limit: int = 20, db_path: str = None) -> list:
+    """[(tag, distinct questions, keywords)] across every stored keyword."""
+    return get_conn(db_path).execute(
+        """
+        SELECT t.tag, COUNT(DISTINCT t.question_id), COUNT(DISTINCT kq.keyword)
+        FROM question_tags t
+        JOIN keyword_questions kq ON kq.question_id = t.question_id
+        GROUP BY t.tag
+        ORDER BY 2 DESC, tag
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+
+
+def get_metric_deltas(keyword: str, since_ts: int,
+                      db_path: str = None) -> pd.DataFrame:
+    """
+    Per-question gains in score, answers and views for `keyword` since unix
+    time `since_ts` ("views gained this week"), largest view gain first.
+    The baseline is the last snapshot at or before `since_ts`, or the first
+    one after it for questions first seen inside the window.
+    """
+    query = """
+        WITH bounds AS (
+            SELECT q.question_id, q.title,
+                   (SELECT ts FROM question_metrics m
+                    WHERE m.question_id = q.question_id
+                    ORDER BY ts DESC LIMIT 1) AS last_ts,
+                   coalesce(
+                       (SELECT ts FROM question_metrics m
+                        WHERE m.question_id = q.question_id AND ts <= :since
+                        ORDER BY ts DESC LIMIT 1),
+                       (SELECT ts FROM question_metrics m
+                        WHERE m.question_id = q.question_id
+                        ORDER BY ts LIMIT 1)
+                   ) AS base_ts
+            FROM keyword_questions kq
+            JOIN questions q ON q.question_id = kq.question_id
+            WHERE kq.keyword = :keyword
+        )
+        SELECT b.question_id, b.title,
+               now.score - base.score AS score_gained,
+               now.answer_count - base.answer_count AS answers_gained,
+               now.view_count - base.view_count AS views_gained
+        FROM bounds b
+        JOIN question_metrics now
+          ON now.question_id = b.question_id AND now.ts = b.last_ts
+        JOIN question_metrics base
+          ON base.question_id = b.question_id AND base.ts = b.base_ts
+        ORDER BY views_gained DESC
+    """
+    return pd.read_sql_query(query, get_conn(db_path),
+                             params={"keyword": keyword, "since": since_ts})
+
+
+def get_keyword_history(limit: int = 30, db_path: str = None):
+    db_path = db_path or DB_PATH
+    if not os.path.exists(db_path):
+        return []
+
+    try:
+        query = """
+            SELECT keyword FROM keywords
+            ORDER BY last_seen DESC
+            LIMIT ?
+        """
+        rows = get_conn(db_path).execute(query, (limit,)).fetchall()
+        return [row[0] for row in rows]
+    except Exception as e:
+        print(f"History error: {e}")
+        return []
+
+
+# ============================================================
+# INSERTS
+# ============================================================
+def display_title(title):
+    """The title as shown in charts: HTML entities decoded."""
+    return html.unescape(title) if title else title
+
+
+def insert_rows(conn: sqlite3.Connection, rows) -> int:
+    """
+    Upsert rows (sequences in COLUMNS order) with one prepared executemany.
+    A question already stored (under any keyword) is updated in place with
+    the latest metrics and linked to this row's keyword. Rows without a
+    question_id are skipped. `rows` may be any iterable, including a
+    generator, and is streamed rather than materialised. Does not commit:
+    callers wrap it in `with conn:` so a page (plus its high-water mark)
+    is one transaction. Returns the number of rows inserted or updated.
+    """
+    links = []
+
+    def questions():
+        for row in rows:
+            # COLUMNS order: keyword, scraped_at, title, <question fields>,
+            # question_id
+            keyword, scraped_at, title, *fields, question_id = row
+            if question_id is None:
+                continue
+            links.append((keyword, question_id, scraped_at))
+            yield (question_id, title, *fields, scraped_at,
+                   display_title(title))
+
+    n_rows = conn.executemany(INSERT_SQL, questions()).rowcount
+    conn.executemany(LINK_SQL, links)
+    return n_rows
+
+
+def replace_tags(conn: sqlite3.Connection, question_tags):
+    """
+    Store the current tags of each (question_id, [tags]) pair, dropping
+    tags a question no longer has. No commit.
+    """
+    question_tags = [(qid, tags) for qid, tags in question_tags
+                     if qid is not None]
+    conn.executemany(
+        "DELETE FROM question_tags WHERE question_id = ?",
+        ((qid,) for qid, _ in question_tags),
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO question_tags (question_id, tag) VALUES (?, ?)",
+        ((qid, tag) for qid, tags in question_tags for tag in tags),
+    )
+
+
+def update_keyword_summary(conn: sqlite3.Connection, keyword: str,
+                           scraped_at: int):
+    """
+    Refresh `keyword`'s row in the `keywords` summary table after an
+    ingest: last_seen moves forward, row_count is recounted through the
+    keyword_questions primary key and version is bumped. No commit.
+    """
+    conn.execute(
+        """
+        INSERT INTO keywords (keyword, last_seen, row_count, version)
+        VALUES (?, ?, (SELECT COUNT(*) FROM keyword_questions
+                       WHERE keyword = ?), 1)
+        ON CONFLICT(keyword) DO UPDATE SET
+            last_seen = max(coalesce(last_seen, 0), excluded.last_seen),
+            row_count = excluded.row_count,
+            version = version + 1
+        """,
+        (keyword, scraped_at, keyword),
+    )
+
+
+def stamp_versions(conn: sqlite3.Connection, keyword: str, question_ids):
+    """
+    After an ingest under `keyword` (whose version update_keyword_summary
+    already bumped): bump `version` of every other keyword linked to
+    `question_ids`, since the questions are shared and their rows changed
+    too, then stamp each link to `question_ids` with its keyword's new
+    version, so the columnar mirror appends just those rows. No commit.
+    """
+    ids = json.dumps([q for q in question_ids if q is not None])
+    conn.execute(
+        """
+        UPDATE keywords SET version = version + 1
+        WHERE keyword != ? AND keyword IN (
+            SELECT keyword FROM keyword_questions
+            WHERE question_id IN (SELECT value FROM json_each(?))
+        )
+        """,
+        (keyword, ids),
+    )
+    conn.execute(
+        """
+        UPDATE keyword_questions SET version = (
+            SELECT k.version FROM keywords k
+            WHERE k.keyword = keyword_questions.keyword
+        )
+        WHERE question_id IN (SELECT value FROM json_each(?))
+        """,
+        (ids,),
+    )
+
+
+def record_metrics(conn: sqlite3.Connection, ts: int, metrics) -> int:
+    """
+    Snapshot (question_id, score, answer_count, view_count) tuples at unix
+    time `ts`, skipping questions whose latest snapshot is identical.
+    No commit. Returns the number of snapshots written.
+    """
+    return conn.executemany(
+        """
+        INSERT OR IGNORE INTO question_metrics
+            (question_id, ts, score, answer_count, view_count)
+        SELECT :qid, :ts, :score, :answers, :views
+        WHERE NOT EXISTS (
+            SELECT 1 FROM (
+                SELECT score, answer_count, view_count
+                FROM question_metrics
+                WHERE question_id = :qid
+                ORDER BY ts DESC
+                LIMIT 1
+            ) AS last
+            WHERE last.score IS :score
+              AND last.answer_count IS :answers
+              AND last.view_count IS :views
+        )
+        """,
+        (
+            {"qid": qid, "ts": ts, "score": score, "answers": answers,
+             "views": views}
+            for qid, score, answers, views in metrics if qid is not None
+        ),
+    ).rowcount
+
+
+# ============================================================
+# INCREMENTAL SCRAPE STATE
+# ============================================================
+def bump_high_water_mark(conn: sqlite3.Connection, keyword: str,
+                         max_creation_ts: int, fetched_at: int = None):
+    """Advance `keyword`'s high-water mark (never moves back). No commit."""
+    conn.execute(
+        """
+        INSERT INTO scrape_state (keyword, max_creation_date, last_fetched_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(keyword) DO UPDATE SET
+            max_creation_date = max(
+                coalesce(max_creation_date, 0),
+                coalesce(excluded.max_creation_date, 0)
+            ),
+            last_fetched_at = coalesce(excluded.last_fetched_at, last_fetched_at)
+        """,
+        (keyword, max_creation_ts, fetched_at),
+    )
+
+
+def get_high_water_mark(conn: sqlite3.Connection, keyword: str):
+    """
+    Newest stored creation_date (unix seconds) for `keyword`, or None if
+    the keyword has never been scraped. Databases created before
+    scrape_state existed fall back to MAX(creation_date) in `questions`.
+    """
+    row = conn.execute(
+        "SELECT max_creation_date FROM scrape_state WHERE keyword = ?",
+        (keyword,),
+    ).fetchone()
+    if row and row[0]:
+        return row[0]
+
+    row = conn.execute(
+        """
+        SELECT MAX(q.creation_date)
+        FROM keyword_questions kq
+        JOIN questions q ON q.question_id = kq.question_id
+        WHERE kq.keyword = ?
+        """,
+        (keyword,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def mark_fetched(conn: sqlite3.Connection, keyword: str, fetched_at: int):
+    """Record that `keyword` was fetched at `fetched_at` (even if nothing new)."""
+    bump_high_water_mark(conn, keyword, None, fetched_at)
+    conn.commit()
+
+
+def get_last_fetched(conn: sqlite3.Connection, keyword: str):
+    """Unix time of the last completed fetch of `keyword`, or None."""
+    row = conn.execute(
+        "SELECT last_fetched_at FROM scrape_state WHERE keyword = ?",
+        (keyword,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def get_refresh_ids(conn: sqlite3.Connection, keyword: str, limit: int,
+                    older_than: int = None) -> list:
+    """
+    Up to `limit` of `keyword`'s stored question ids whose metrics were
+    refreshed longest ago (updated_at), and before `older_than` if given,
+    for a metric-only re-fetch.
+    """
+    return [row[0] for row in conn.execute(
+        """
+        SELECT q.question_id
+        FROM keyword_questions kq
+        JOIN questions q ON q.question_id = kq.question_id
+        WHERE kq.keyword = ? AND coalesce(q.updated_at, 0) < ?
+        ORDER BY coalesce(q.updated_at, 0), q.question_id
+        LIMIT ?
+        """,
+        (keyword, older_than if older_than is not None else 1 << 62, limit),
+    )]
+
+
+def mark_refreshed(conn: sqlite3.Connection, question_ids, ts: int):
+    """
+    Set updated_at of `question_ids` to `ts` without touching their data,
+    for ids a metric refresh asked for but the API no longer returns.
+    """
+    with conn:
+        conn.execute(
+            """
+            UPDATE questions SET updated_at = ?
+            WHERE question_id IN (SELECT value FROM json_each(?))
+            """,
+            (ts, json.dumps(list(question_ids))),
+        )
+
+
+# ============================================================
+# KEYWORD VIEWS (refresh priority)
+# ============================================================
+def get_keyword_views(db_path: str = None) -> dict:
+    """{keyword: dashboard views} for every keyword opened at least once."""
+    try:
+        return dict(get_conn(db_path).execute(
+            "SELECT keyword, views FROM keyword_views"
+        ))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def record_view(keyword: str, db_path: str = None):
+    """Count one dashboard view of `keyword`."""
+    get_writer(db_path).run(_record_view, keyword, int(time.time()))
+
+
+def _record_view(conn: sqlite3.Connection, keyword: str, viewed_at: int):
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO keyword_views (keyword, views, last_viewed_at)
+            VALUES (?, 1, ?)
+            ON CONFLICT(keyword) DO UPDATE SET
+                views = views + 1,
+                last_viewed_at = excluded.last_viewed_at
+            """,
+            (keyword, viewed_at),
+        )
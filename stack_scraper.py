@@ -0,0 +1,249 @@
+import os
+import sqlite3
+import time
+
+from stack_client import get_client
+from stack_db import (bump_high_water_mark, get_conn, get_high_water_mark,
+                      get_refresh_ids, get_writer, insert_rows, mark_fetched,
+                      mark_refreshed, record_metrics, refresh_mirror,
+                      replace_tags, stamp_versions, update_keyword_summary)
+
+# STACK_API_ROOT lets the scraper run against a local stand-in
+# (see benchmarks/mock_api.py)
+API_ROOT = os.environ.get("STACK_API_ROOT", "https://api.stackexchange.com/2.3")
+API_URL = f"{API_ROOT}/search"
+QUESTIONS_URL = f"{API_ROOT}/questions"
+PAGE_SIZE = 100
+
+# ids per /questions/{ids} request (the API maximum)
+IDS_PER_REQUEST = 100
+
+# how many result pages a single scrape walks by default
+# (1 page == the old single-request behaviour)
+DEFAULT_MAX_PAGES = 1
+
+
+# ============================================================
+# API FETCHING
+# ============================================================
+def fetch_page(keyword: str, page: int = 1, fromdate: int = None,
+               use_cache: bool = True) -> dict:
+    """
+    Fetch one result page of an intitle search and return the JSON body.
+
+    Without `fromdate` this is the classic top-voted search. With it, only
+    questions created at or after `fromdate` (unix seconds) are returned,
+    oldest first, so a high-water mark can advance page by page.
+    `use_cache=False` always asks the API (full rescrapes).
+    """
+    params = {
+        "order": "desc",
+        "sort": "votes",
+        "intitle": keyword,
+        "site": "stackoverflow",
+        "pagesize": PAGE_SIZE,
+        "page": page,
+    }
+    if fromdate is not None:
+        params.update(order="asc", sort="creation", fromdate=fromdate)
+    return get_client().get_json(API_URL, params, use_cache=use_cache)
+
+
+def fetch_questions(question_ids) -> dict:
+    """
+    Fetch up to IDS_PER_REQUEST questions by id and return the JSON body.
+    Never served from the response cache: this is how stored metrics are
+    refreshed.
+    """
+    ids = ";".join(str(q) for q in question_ids)
+    params = {"site": "stackoverflow", "pagesize": IDS_PER_REQUEST}
+    return get_client().get_json(f"{QUESTIONS_URL}/{ids}", params,
+                                 use_cache=False)
+
+
+def iter_pages(keyword: str, max_pages: int = DEFAULT_MAX_PAGES,
+               fromdate: int = None, queued_keywords: int = 1,
+               use_cache: bool = True, walk: dict = None):
+    """
+    Yield (page_number, items, from_cache) for each result page of an
+    intitle search, following `has_more` until it runs out or `max_pages`
+    is reached. `from_cache` is True when the page came from the response
+    cache (its rows were already stored when it was first fetched).
+
+    Stops early once this keyword has used its share of the remaining
+    daily API quota (split across `queued_keywords`); that sets
+    `walk["quota_cut"]`, since the keyword was not fully fetched.
+    """
+    scheduler = get_client().scheduler
+    page = 1
+    while page <= max_pages:
+        if page > scheduler.page_budget(max_pages, queued_keywords):
+            print(f"Quota budget reached for '{keyword}' at page {page}")
+            if walk is not None:
+                walk["quota_cut"] = True
+            break
+        data = fetch_page(keyword, page, fromdate, use_cache)
+
+        yield page, data.get("items", []), data.get("_from_cache", False)
+
+        if not data.get("has_more"):
+            break
+        page += 1
+
+
+def parse_item(item: dict, keyword: str, scraped_at: int) -> list:
+    """Turn one API item into a row in stack_db.COLUMNS order."""
+    title = item.get("title", "No title")
+    author = item.get("owner", {}).get("display_name", "Anonymous")
+    score = item.get("score", 0)
+    link = item.get("link", "")
+    answer_count = item.get("answer_count", 0)
+    is_answered = 1 if item.get("is_answered", False) else 0
+    view_count = item.get("view_count", 0)
+    creation_date = item.get("creation_date")  # unix timestamp
+    tags = ",".join(item.get("tags", []))
+    question_id = item.get("question_id")
+
+    return [
+        keyword, scraped_at, title, author, score, link,
+        answer_count, is_answered, view_count, creation_date, tags,
+        question_id
+    ]
+
+
+# ============================================================
+# SCRAPE → SQLITE
+# ============================================================
+def store_items(conn: sqlite3.Connection, items, keyword: str,
+                scraped_at: int):
+    """
+    Stream API items (a list or any generator) straight into `questions`
+    and `keyword_questions` with prepared upserts, and update tags, metric
+    snapshots, high-water mark and summary row in the same transaction,
+    plus the version of other keywords sharing the stored questions.
+    No intermediate list or DataFrame of rows.
+    Returns (rows_stored, seconds).
+    """
+    newest = [None]
+    tags = []
+    metrics = []
+
+    def rows():
+        for item in items:
+            ts = item.get("creation_date")
+            if ts and (newest[0] is None or ts > newest[0]):
+                newest[0] = ts
+            qid = item.get("question_id")
+            tags.append((qid, item.get("tags", [])))
+            metrics.append((qid, item.get("score", 0),
+                            item.get("answer_count", 0),
+                            item.get("view_count", 0)))
+            yield parse_item(item, keyword, scraped_at)
+
+    start = time.perf_counter()
+    with conn:
+        n_rows = insert_rows(conn, rows())
+        replace_tags(conn, tags)
+        record_metrics(conn, scraped_at, metrics)
+        if newest[0] is not None:
+            bump_high_water_mark(conn, keyword, newest[0])
+        update_keyword_summary(conn, keyword, scraped_at)
+        stamp_versions(conn, keyword, [qid for qid, _ in tags])
+    return n_rows, time.perf_counter() - start
+
+
+def scrape_keyword(keyword: str, max_pages: int = DEFAULT_MAX_PAGES,
+                   db_path: str = None, on_page=None, full: bool = False):
+    """
+    Scrape StackOverflow via StackExchange API for a keyword
+    and upsert rows into the SQLite DB (one row per question and keyword).
+
+    Incremental by default: once a keyword has been scraped, only questions
+    newer than its stored high-water mark are requested. Pass `full=True`
+    (or scrape a keyword for the first time) to run the top-voted search.
+
+    Pages are written (and committed) one at a time as they arrive, so
+    memory stays flat and a crawl that is cut off keeps what it already
+    fetched. `on_page(page, items)` is called after each page is stored.
+
+    Returns a summary dict with per-page insert timings.
+    """
+    if not keyword:
+        return None
+
+    scraped_at = int(time.time())
+    stats = {"keyword": keyword, "pages": 0, "rows": 0, "insert_seconds": []}
+
+    writer = get_writer(db_path)
+    hwm = None if full else get_high_water_mark(get_conn(db_path), keyword)
+    fromdate = hwm + 1 if hwm else None
+    stats["mode"] = "incremental" if fromdate else "full"
+
+    walk = {}
+    # a full rescrape must reach the API, not replay cached pages
+    for page, items, from_cache in iter_pages(keyword, max_pages, fromdate,
+                                              use_cache=not full, walk=walk):
+        if from_cache:
+            stats["cached_pages"] = stats.get("cached_pages", 0) + 1
+            continue
+
+        if not items:
+            break
+
+        n_rows, elapsed = writer.run(store_items, items, keyword, scraped_at)
+        stats["pages"] += 1
+        stats["rows"] += n_rows
+        stats["insert_seconds"].append(elapsed)
+        print(
+            f"  page {page}: stored {n_rows} rows "
+            f"in {elapsed * 1000:.1f} ms"
+        )
+
+        if on_page is not None:
+            on_page(page, items)
+
+    # a walk the quota cut short stays due for the next scrape
+    if not walk.get("quota_cut"):
+        writer.run(mark_fetched, keyword, scraped_at)
+    if stats["pages"]:
+        refresh_mirror(keyword, db_path)
+
+    total_ms = sum(stats["insert_seconds"]) * 1000
+    print(
+        f"Scraped {stats['rows']} questions for '{keyword}' "
+        f"({stats['mode']}, {stats['pages']} pages, {total_ms:.1f} ms inserting)"
+    )
+    return stats
+
+
+def refresh_metrics(keyword: str, max_questions: int = IDS_PER_REQUEST,
+                    db_path: str = None, older_than: int = None) -> int:
+    """
+    Re-fetch `keyword`'s least recently refreshed stored questions by id
+    (only those last refreshed before `older_than`, if given), so score,
+    answers and views keep moving (and question_metrics gets new
+    snapshots) even when an incremental scrape finds nothing new.
+    Costs one request per IDS_PER_REQUEST questions. Returns rows stored.
+    """
+    ids = get_refresh_ids(get_conn(db_path), keyword, max_questions,
+                          older_than)
+    if not ids:
+        return 0
+
+    scraped_at = int(time.time())
+    writer = get_writer(db_path)
+    rows = 0
+    for i in range(0, len(ids), IDS_PER_REQUEST):
+        chunk = ids[i:i + IDS_PER_REQUEST]
+        items = fetch_questions(chunk).get("items", [])
+        if items:
+            n_rows, _ = writer.run(store_items, items, keyword, scraped_at)
+            rows += n_rows
+        # deleted questions are not returned; move them to the back of
+        # the rotation instead of asking for them on every pass
+        missing = set(chunk) - {item.get("question_id") for item in items}
+        if missing:
+            writer.run(mark_refreshed, missing, scraped_at)
+    if rows:
+        refresh_mirror(keyword, db_path)
+    return rows